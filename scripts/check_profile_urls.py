@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import time
+from datetime import datetime
+
+import aiohttp
+
+from generate_owler_profile_urls import OUTPUT_DIR, BASE_URL
+from compressed_io import open_csv, compression_for, with_compression, csv_stem, glob_csv
+
+# Configuration
+DEFAULT_CONCURRENCY = 200  # Requests in flight at once
+DEFAULT_PER_HOST = 100  # Pooled keep-alive connections per host
+DEFAULT_RATE = 0  # Requests per second across all workers (0 = unlimited)
+DEFAULT_RETRIES = 3  # Retries after a connection error, timeout or retryable status
+DEFAULT_TIMEOUT = 10  # Seconds per request
+BACKOFF_BASE = 0.5  # Seconds before the first retry; doubles on each attempt (with jitter)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60  # Seconds; longer Retry-After values are capped
+RESULT_BUFFER = 4  # Finished rows held per worker while an earlier row is still being checked
+PROGRESS_INTERVAL = 5  # Seconds between progress lines
+
+
+class RateLimiter:
+    """Space request starts evenly so the checker stays under a requests-per-second budget"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(self.next_slot, now)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with jitter, or the server's Retry-After (capped) when it gives seconds"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_AFTER)
+    return BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random())
+
+def rewrite_base_url(url, base_url):
+    """Point a generated profile URL at another host (e.g. a local stand-in server)"""
+    if base_url and url.startswith(BASE_URL):
+        return base_url.rstrip('/') + url[len(BASE_URL):]
+    return url
+
+async def check_url(session, url, limiter, retries=DEFAULT_RETRIES, method="HEAD"):
+    """Return the final HTTP status of a URL as a string, or 'error: <type>' if it never answered"""
+    attempt = 0
+    while True:
+        await limiter.wait()
+        try:
+            async with session.request(method, url, allow_redirects=True) as response:
+                status = str(response.status)
+                if response.status == 405 and method == "HEAD":
+                    # Server does not support HEAD for this path; ask again with GET (not a retry)
+                    method = "GET"
+                    continue
+                if method == "GET":
+                    # Drain the body so the connection goes back to the pool
+                    await response.read()
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    await asyncio.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+                    attempt += 1
+                    continue
+                return status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = f"error: {type(e).__name__}"
+            if attempt >= retries:
+                return status
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+async def check_rows(rows, writer, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                     rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                     method="HEAD", base_url=None):
+    """Check each row's profile_url and write the row back with a status column, in input order
+
+    A fixed pool of worker tasks pulls rows from a bounded queue, so at most
+    `concurrency` requests are in flight. Workers stop taking rows while
+    RESULT_BUFFER × concurrency finished rows wait on an earlier one, so
+    memory stays bounded. Rows without a profile_url get an empty status.
+    Returns {status: count}.
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host,
+                                     ttl_dns_cache=300, keepalive_timeout=30)
+    limiter = RateLimiter(rate)
+    row_queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = {}
+    result_ready = asyncio.Event()
+    room = asyncio.Event()
+    max_buffered = RESULT_BUFFER * concurrency
+    counts = {}
+
+    async def worker(session):
+        while True:
+            # The row the writer is waiting for is already in flight, so this cannot stall it
+            while len(results) >= max_buffered:
+                room.clear()
+                await room.wait()
+            item = await row_queue.get()
+            if item is None:
+                return
+            index, row = item
+            url = row.get('profile_url', '')
+            row['status'] = await check_url(session, rewrite_base_url(url, base_url), limiter,
+                                            retries, method) if url else ''
+            results[index] = row
+            result_ready.set()
+
+    async def produce():
+        for index, row in enumerate(rows):
+            await row_queue.put((index, row))
+        for _ in range(concurrency):
+            await row_queue.put(None)
+
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(worker(session)) for _ in range(concurrency)]
+        all_done = asyncio.gather(*tasks)
+        all_done.add_done_callback(lambda _: result_ready.set())
+
+        next_index = 0
+        start_time = last_report = time.time()
+        while True:
+            # Write finished rows as soon as everything before them is finished too
+            while next_index in results:
+                row = results.pop(next_index)
+                writer.writerow(row)
+                counts[row['status']] = counts.get(row['status'], 0) + 1
+                next_index += 1
+            room.set()
+            if all_done.done() and not results:
+                break
+            if all_done.done() and all_done.exception():
+                raise all_done.exception()
+            result_ready.clear()
+            await result_ready.wait()
+
+            if time.time() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.time()
+                print(f"  {next_index:,} URLs checked ({next_index / (last_report - start_time):,.0f}/s)")
+
+        await all_done
+    return counts
+
+def check_file(input_file, output_file, **options):
+    """Check every profile_url in a *_with_urls_* CSV and write it back with a status column"""
+    with open_csv(input_file) as infile, open_csv(output_file, 'w') as outfile:
+        reader = csv.DictReader(infile)
+        fieldnames = [name for name in reader.fieldnames or [] if name != 'status'] + ['status']
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        return asyncio.run(check_rows(reader, writer, **options))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that generated Owler profile URLs resolve")
+    parser.add_argument("--input", help="CSV to check (default: choose a *_with_urls_*.csv interactively)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help=f"pooled keep-alive connections per host (default: {DEFAULT_PER_HOST})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="maximum requests per second (default: unlimited)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"retries with backoff on errors, 429 and 5xx (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds per request (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--get", action="store_true", help="use GET instead of HEAD")
+    parser.add_argument("--base-url",
+                        help=f"send requests to this base instead of {BASE_URL}, path prefix included "
+                             f"(e.g. http://127.0.0.1:8080/iaApp for a local test server)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Profile URL Checker")
+    print("=" * 60)
+
+    selected_file = args.input
+    if not selected_file:
+        csv_files = [f for f in glob_csv(os.path.join(OUTPUT_DIR, "*_with_urls_*.csv"))
+                     if "_checked_" not in os.path.basename(f)]
+        if not csv_files:
+            print(f"\n✗ No URL files found in {OUTPUT_DIR}")
+            print("Looking for files matching pattern: *_with_urls_*.csv")
+            exit(1)
+
+        print(f"\nFound {len(csv_files)} CSV file(s) in output directory:")
+        for i, csv_file in enumerate(csv_files, 1):
+            print(f"  {i}. {os.path.basename(csv_file)}")
+
+        print("\nSelect a file to process (enter number):")
+        try:
+            choice = int(input("> "))
+            if choice < 1 or choice > len(csv_files):
+                print("\n✗ Invalid selection")
+                exit(1)
+            selected_file = csv_files[choice - 1]
+        except (ValueError, KeyboardInterrupt):
+            print("\n✗ Invalid input or cancelled")
+            exit(1)
+
+    print(f"\nSelected: {os.path.basename(selected_file)}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    input_basename = csv_stem(selected_file)
+    output_filename = with_compression(
+        os.path.join(os.path.dirname(selected_file) or ".", f"{input_basename}_checked_{timestamp}.csv"),
+        compression_for(selected_file)
+    )
+
+    try:
+        start_time = time.time()
+        counts = check_file(
+            selected_file, output_filename,
+            concurrency=args.concurrency, per_host=args.per_host, rate=args.rate,
+            retries=args.retries, timeout=args.timeout,
+            method="GET" if args.get else "HEAD", base_url=args.base_url,
+        )
+        elapsed_time = time.time() - start_time
+        total = sum(counts.values())
+
+        print(f"\n✓ Checked {total} rows in {elapsed_time:.2f} seconds ({total / max(elapsed_time, 1e-9):,.0f}/s)")
+        print(f"\nSummary:")
+        for status, count in sorted(counts.items()):
+            print(f"  {status or 'no URL'}: {count}")
+        print(f"  Output file: {output_filename}")
+
+    except KeyboardInterrupt:
+        print("\n✗ Cancelled by user.")
+        exit(1)
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
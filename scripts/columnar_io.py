@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+import glob
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # Optional: only needed for .parquet/.arrow snapshots
+
+# Configuration
+COLUMNAR_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}  # Format chosen by file extension
+ROW_GROUP_SIZE = 100000  # Rows buffered per Parquet row group / Arrow record batch
+PARQUET_COMPRESSION = "zstd"
+
+
+def columnar_format(path):
+    """Return 'parquet', 'arrow' or None from a file name's extension"""
+    for fmt, extension in COLUMNAR_EXTENSIONS.items():
+        if path.endswith(extension):
+            return fmt
+    return None
+
+def with_format(path, fmt):
+    """Swap a .csv file name to the extension of a columnar format ('csv' or None keeps it)"""
+    if fmt in COLUMNAR_EXTENSIONS:
+        return os.path.splitext(path)[0] + COLUMNAR_EXTENSIONS[fmt]
+    return path
+
+def glob_columnar(pattern):
+    """Find the columnar variants of a *.csv glob pattern (x_*.csv -> x_*.parquet, x_*.arrow)"""
+    stem = pattern[:-len(".csv")] if pattern.endswith(".csv") else pattern
+    matches = set()
+    for extension in COLUMNAR_EXTENSIONS.values():
+        matches.update(glob.glob(stem + extension))
+    return sorted(matches)
+
+def require_pyarrow(path):
+    if pa is None:
+        raise RuntimeError(f"pyarrow is not installed, cannot use {path} (pip install pyarrow)")
+
+class ColumnarWriter:
+    """Write string rows to Parquet (dictionary-encoded) or Arrow IPC, one row group at a time
+
+    Mirrors csv.writer's writerow/writerows so a cursor can stream into it;
+    every `row_group_size` rows become one Parquet row group or Arrow record
+    batch, so memory stays bounded by a single group.
+    """
+
+    def __init__(self, path, columns, fmt=None, row_group_size=ROW_GROUP_SIZE):
+        require_pyarrow(path)
+        self.fmt = fmt or columnar_format(path)
+        self.columns = list(columns)
+        self.schema = pa.schema([(name, pa.string()) for name in self.columns])
+        self.row_group_size = row_group_size
+        self.pending = []
+        if self.fmt == "parquet":
+            self.writer = pq.ParquetWriter(path, self.schema, use_dictionary=True, compression=PARQUET_COMPRESSION)
+        elif self.fmt == "arrow":
+            self.sink = pa.OSFile(path, 'wb')
+            self.writer = pa.ipc.new_file(self.sink, self.schema)
+        else:
+            raise ValueError(f"Unknown columnar format for {path}")
+
+    def writerow(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= self.row_group_size:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if not self.pending:
+            return
+        arrays = [pa.array([None if row[i] is None else str(row[i]) for row in self.pending], pa.string())
+                  for i in range(len(self.columns))]
+        batch = pa.record_batch(arrays, schema=self.schema)
+        if self.fmt == "parquet":
+            self.writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self.writer.write_batch(batch)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if self.fmt == "arrow":
+            self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_columns(path, columns):
+    """Read only the given columns as a string table; Arrow IPC files are memory-mapped (zero-copy)
+
+    Columns missing from the file come back as empty strings, and nulls are
+    read as empty strings, matching what the CSV readers produce.
+    """
+    require_pyarrow(path)
+    if columnar_format(path) == "arrow":
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+    else:
+        present = set(pq.read_schema(path).names)
+        table = pq.read_table(path, columns=[c for c in columns if c in present], memory_map=True)
+
+    arrays = []
+    for name in columns:
+        if name in table.column_names:
+            column = table.column(name)
+            if column.type != pa.string():
+                column = column.cast(pa.string())
+            # Leave null-free columns untouched so memory-mapped buffers are not copied
+            arrays.append(column.fill_null('') if column.null_count else column)
+        else:
+            arrays.append(pa.chunked_array([pa.array([''] * table.num_rows, pa.string())]))
+    return pa.table(arrays, names=list(columns))
+
+def iter_column_rows(path, columns):
+    """Yield tuples of the given columns, converting one record batch at a time"""
+    for batch in read_columns(path, columns).to_batches():
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+def lookup_subset(table, keys, key_column, value_column):
+    """Return {key: value} for the given keys via a vectorized is_in filter over a read_columns() table"""
+    mask = pc.is_in(table.column(key_column), value_set=pa.array(list(dict.fromkeys(keys)), pa.string()))
+    found = table.filter(mask)
+    # Later rows win, matching the CSV loaders
+    return dict(zip(found.column(key_column).to_pylist(), found.column(value_column).to_pylist()))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import glob
+import gzip
+import io
+import os
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # Optional: only needed for .zst files
+
+# Configuration
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}  # Compression chosen by file extension
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+WRITE_BUFFER_SIZE = 1024 * 1024  # Bytes handed to the compression thread at a time
+WRITE_QUEUE_SIZE = 16  # Buffers queued before the writer waits for the compression thread
+
+_FROM_EXTENSION = object()
+
+
+def compression_for(path):
+    """Return 'gzip', 'zstd' or None from a file name's extension"""
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+def with_compression(path, compression):
+    """Append the extension for a compression ('gzip', 'zstd' or None) to a file name"""
+    return path + COMPRESSION_EXTENSIONS[compression] if compression else path
+
+def strip_compression(path):
+    """Remove a trailing .gz/.zst from a file name"""
+    compression = compression_for(path)
+    return path[:-len(COMPRESSION_EXTENSIONS[compression])] if compression else path
+
+def csv_stem(path):
+    """Base name without the compression extension and .csv (dir/x.csv.gz -> x)"""
+    return os.path.splitext(os.path.basename(strip_compression(path)))[0]
+
+def glob_csv(pattern):
+    """glob() that also finds the compressed variants of each match (*.csv also finds *.csv.gz, *.csv.zst)"""
+    matches = set(glob.glob(pattern))
+    for extension in COMPRESSION_EXTENSIONS.values():
+        matches.update(glob.glob(pattern + extension))
+    return sorted(matches)
+
+def open_compressed(path, mode, compression):
+    """Open a binary stream that (de)compresses to/from path; mode is 'rb' or 'wb'"""
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL) if mode == 'wb' else gzip.open(path, mode)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is not installed, cannot open {path} (pip install zstandard)")
+        if mode == 'wb':
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, 'wb'), closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    raise ValueError(f"Unknown compression: {compression}")
+
+class BackgroundCompressor(io.RawIOBase):
+    """Writable byte stream whose data is compressed into the target file on a separate thread
+
+    The caller only pays for queueing buffers, so compression overlaps
+    whatever produces the rows (e.g. waiting on a MongoDB cursor). Errors in
+    the compression thread are raised on the next write or on close.
+    """
+
+    def __init__(self, path, compression):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._error = None
+        self._target = open_compressed(path, 'wb', compression)
+        self._thread = threading.Thread(target=self._run, name=f"compress-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                data = self._queue.get()
+                if data is None:
+                    return
+                # After an error keep draining, so the writer never blocks on a full queue
+                if self._error is None:
+                    try:
+                        self._target.write(data)
+                    except BaseException as e:
+                        self._error = e
+        finally:
+            try:
+                self._target.close()
+            except BaseException as e:
+                self._error = self._error or e
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        # The buffered writer reuses its buffer, so hand over a copy
+        self._queue.put(bytes(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._queue.put(None)
+            self._thread.join()
+            super().close()
+            if self._error is not None:
+                raise self._error
+
+def open_csv(path, mode='r', compression=_FROM_EXTENSION):
+    """Open a CSV for text reading ('r') or writing ('w'), compressed according to its extension
+
+    Pass `compression` explicitly when the name does not say (e.g. a
+    `.tmp` file that is renamed to `x.csv.gz` later). Writes to compressed
+    files are compressed on a background thread.
+    """
+    if compression is _FROM_EXTENSION:
+        compression = compression_for(path)
+    if not compression:
+        return open(path, mode, newline='', encoding='utf-8')
+    if mode == 'r':
+        return io.TextIOWrapper(open_compressed(path, 'rb', compression), encoding='utf-8', newline='')
+    if mode == 'w':
+        stream = io.BufferedWriter(BackgroundCompressor(path, compression), buffer_size=WRITE_BUFFER_SIZE)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    raise ValueError(f"Unsupported mode for compressed CSV: {mode}")
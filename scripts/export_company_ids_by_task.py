@@ -1,21 +1,36 @@
 #!/usr/bin/env python3
 
+import argparse
 import csv
+import itertools
+import os
+import queue
+import shutil
 import ssl
 import certifi
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from bson import ObjectId
 
+from generate_owler_profile_urls import generate_profile_url
+from compressed_io import open_csv, with_compression
+from columnar_io import ColumnarWriter, COLUMNAR_EXTENSIONS
+
 # Configuration
 # Replace with your MongoDB connection string:
 # MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
 MONGODB_URI = ""
 DATABASE_NAME = "owler"
 COLLECTION_NAME = "cp_task"
+COMPANY_COLLECTION = "company"  # Joined server-side in --with-urls mode
 DEFAULT_LIMIT = 10000  # Default number of documents to fetch
+DEFAULT_BATCH_SIZE = 10000  # Documents per cursor batch in multi-type mode
+WRITER_QUEUE_SIZE = 8  # Row batches buffered per task type before the reader waits
+OUTPUT_COMPRESSION = None  # "gzip" or "zstd" to write compressed exports (.csv.gz/.csv.zst); --compress overrides
+OUTPUT_FORMAT = "csv"  # "csv", "parquet" or "arrow" for the single-type export; --format overrides
 
 
 def convert_to_serializable(obj):
@@ -30,46 +45,354 @@ def convert_to_serializable(obj):
         return [convert_to_serializable(item) for item in obj]
     return obj
 
-def write_to_csv(data, collection_name, task_type):
-    """Write results to CSV file"""
-    if not data:
-        print("No data to write to CSV")
-        return
+def serialize_value(value):
+    """Convert one MongoDB value to a CSV cell, with fast paths for the common types"""
+    value_type = type(value)
+    if value_type is str or value_type is int:
+        return value
+    if value_type is ObjectId:
+        return str(value)
+    if value_type is datetime:
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        # Flatten nested objects for CSV
+        return str(convert_to_serializable(value))
+    return convert_to_serializable(value)
+
+def fields_from_projection(projection):
+    """Derive the CSV columns from an inclusion projection, or None if it cannot tell"""
+    if not projection:
+        return None
+    included = {key.split(".")[0] for key, value in projection.items() if value and key != "_id"}
+    if not included:
+        return None
+    if projection.get("_id", 1):
+        included.add("_id")
+    return sorted(included)
+
+def stream_fixed_columns(cursor, task_type, fieldnames, compression=OUTPUT_COMPRESSION):
+    """Single-write path of stream_to_csv for columns known up front (an inclusion projection)"""
+    column_index = {key: i for i, key in enumerate(fieldnames)}
+    tmp_file = with_compression(f"{task_type}.csv", compression) + ".tmp"
+    count = 0
+    try:
+        with open_csv(tmp_file, 'w', compression) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            for doc in cursor:
+                row = [''] * len(fieldnames)
+                for key, value in doc.items():
+                    i = column_index.get(key)
+                    if i is None:
+                        raise ValueError(f"Field '{key}' is not in the projection")
+                    row[i] = serialize_value(value)
+                writer.writerow(row)
+                count += 1
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
     
-    # Convert all objects to serializable format
-    serializable_data = [convert_to_serializable(doc) for doc in data]
+    if not count:
+        os.remove(tmp_file)
+        return None, 0, fieldnames
     
     # Generate filename with actual document count
-    filename = f"{task_type}_{len(serializable_data)}.csv"
+    filename = with_compression(f"{task_type}_{count}.csv", compression)
+    os.replace(tmp_file, filename)
+    return filename, count, fieldnames
+
+def stream_to_csv(cursor, task_type, projection=None, infer_rows=DEFAULT_BATCH_SIZE, compression=OUTPUT_COMPRESSION):
+    """Stream documents from a cursor to `{task_type}_{count}.csv` in a single pass
+    
+    When the projection fixes the columns, the header and rows go straight to
+    a temporary file that is renamed once the final count is known.
+    Otherwise columns are inferred from the first `infer_rows` documents,
+    columns first seen later are appended as they appear, and the file is
+    re-laid out with sorted columns at the end.
+    Returns (filename, count, fieldnames); filename is None when nothing was written.
+    """
+    fieldnames = fields_from_projection(projection)
+    if fieldnames is not None:
+        return stream_fixed_columns(cursor, task_type, fieldnames, compression)
+    
+    documents = iter(cursor)
+    buffered = []
+    keys = set()
+    for doc in itertools.islice(documents, infer_rows):
+        buffered.append(doc)
+        keys.update(doc.keys())
+    fieldnames = sorted(keys)
+    
+    columns = list(fieldnames)
+    column_index = {key: i for i, key in enumerate(columns)}
+    body_file = f"{task_type}.csv.body.tmp"
+    tmp_file = None
+    count = 0
     
     try:
-        # Get all unique keys from all documents
-        all_keys = set()
-        for doc in serializable_data:
-            all_keys.update(doc.keys())
-        
-        fieldnames = sorted(all_keys)
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for doc in serializable_data:
-                # Flatten nested objects for CSV
-                flat_doc = {}
+        with open(body_file, 'w', newline='', encoding='utf-8') as body:
+            writer = csv.writer(body)
+            for doc in itertools.chain(buffered, documents):
+                row = [''] * len(columns)
                 for key, value in doc.items():
-                    if isinstance(value, (dict, list)):
-                        flat_doc[key] = str(value)
-                    else:
-                        flat_doc[key] = value
-                writer.writerow(flat_doc)
+                    i = column_index.get(key)
+                    if i is None:
+                        # Late column: earlier rows are padded when the file is finalized
+                        i = len(columns)
+                        columns.append(key)
+                        column_index[key] = i
+                        row.append('')
+                    row[i] = serialize_value(value)
+                writer.writerow(row)
+                count += 1
         
-        print(f"✓ Data exported to {filename}")
-        print(f"  Total records: {len(serializable_data)}")
-        print(f"  Fields: {len(fieldnames)}")
+        if not count:
+            os.remove(body_file)
+            return None, 0, columns
         
-    except Exception as e:
-        print(f"✗ Error writing to CSV: {e}")
+        # Generate filename with actual document count
+        filename = with_compression(f"{task_type}_{count}.csv", compression)
+        final_columns = sorted(columns)
+        tmp_file = f"{filename}.tmp"
+        with open_csv(tmp_file, 'w', compression) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(final_columns)
+            with open(body_file, 'r', newline='', encoding='utf-8') as body:
+                if columns == final_columns:
+                    shutil.copyfileobj(body, csvfile)
+                else:
+                    order = [column_index[key] for key in final_columns]
+                    for row in csv.reader(body):
+                        row.extend([''] * (len(columns) - len(row)))
+                        writer.writerow([row[i] for i in order])
+    except BaseException:
+        # Leave no partial export behind
+        for path in (body_file, tmp_file):
+            if path and os.path.exists(path):
+                os.remove(path)
+        raise
+    
+    os.replace(tmp_file, filename)
+    os.remove(body_file)
+    return filename, count, final_columns
+
+def stream_to_columnar(cursor, task_type, fmt, projection=None, infer_rows=DEFAULT_BATCH_SIZE):
+    """Stream documents from a cursor to `{task_type}_{count}.parquet` (or `.arrow`) in row groups
+    
+    The schema is fixed before the first row group is written, so columns
+    come from the projection or the first `infer_rows` documents; a column
+    first seen after that is an error (use CSV for such exports).
+    Returns (filename, count, fieldnames); filename is None when nothing was written.
+    """
+    documents = iter(cursor)
+    buffered = []
+    fieldnames = fields_from_projection(projection)
+    if fieldnames is None:
+        keys = set()
+        for doc in itertools.islice(documents, infer_rows):
+            buffered.append(doc)
+            keys.update(doc.keys())
+        fieldnames = sorted(keys)
+    
+    column_index = {key: i for i, key in enumerate(fieldnames)}
+    tmp_file = f"{task_type}{COLUMNAR_EXTENSIONS[fmt]}.tmp"
+    count = 0
+    try:
+        with ColumnarWriter(tmp_file, fieldnames, fmt) as writer:
+            for doc in itertools.chain(buffered, documents):
+                row = [''] * len(fieldnames)
+                for key, value in doc.items():
+                    i = column_index.get(key)
+                    if i is None:
+                        raise ValueError(f"Field '{key}' appeared after the {fmt} schema was fixed")
+                    row[i] = serialize_value(value)
+                writer.writerow(row)
+                count += 1
+    except BaseException:
+        # The writer may have failed before creating the file (e.g. pyarrow missing)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    
+    if not count:
+        os.remove(tmp_file)
+        return None, 0, fieldnames
+    
+    # Generate filename with actual document count
+    filename = f"{task_type}_{count}{COLUMNAR_EXTENSIONS[fmt]}"
+    os.replace(tmp_file, filename)
+    return filename, count, fieldnames
+
+def drain_to_csv(row_queue, filename, compression=None):
+    """Write row batches from a queue to CSV until a None sentinel arrives"""
+    count = 0
+    with open_csv(filename, 'w', compression) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['company_id'])
+        while True:
+            rows = row_queue.get()
+            if rows is None:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def export_task_types(collection, limits, batch_size=DEFAULT_BATCH_SIZE, compression=OUTPUT_COMPRESSION):
+    """Export OPEN company IDs for several task types in one pass into per-type CSVs
+    
+    `limits` maps task_type to its row limit. Rows are routed to one writer
+    thread per task type, and the cursor is abandoned as soon as every type
+    has reached its limit. Returns {task_type: (filename, count)}.
+    """
+    if not limits:
+        return {}
+    
+    queues = {task_type: queue.Queue(WRITER_QUEUE_SIZE) for task_type in limits}
+    tmp_files = {task_type: f"{task_type}.csv.tmp" for task_type in limits}
+    pending = {task_type: [] for task_type in limits}
+    counts = {task_type: 0 for task_type in limits}
+    remaining = set(limits)
+    
+    cursor = collection.find(
+        {"status": "OPEN", "task_type": {"$in": list(limits)}},
+        {"company_id": 1, "task_type": 1, "_id": 0}
+    ).batch_size(batch_size)
+    
+    def put_rows(task_type, rows):
+        """Queue rows for a writer; if the writer has died, raise its error instead of blocking forever"""
+        while True:
+            if futures[task_type].done():
+                futures[task_type].result()
+                raise RuntimeError(f"CSV writer for {task_type} stopped early")
+            try:
+                queues[task_type].put(rows, timeout=1)
+                return
+            except queue.Full:
+                continue
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(limits)) as executor:
+            futures = {task_type: executor.submit(drain_to_csv, queues[task_type], tmp_files[task_type], compression)
+                       for task_type in limits}
+            try:
+                for doc in cursor:
+                    task_type = doc.get("task_type")
+                    if task_type not in remaining:
+                        continue
+                    
+                    pending[task_type].append([serialize_value(doc.get("company_id", ""))])
+                    counts[task_type] += 1
+                    if len(pending[task_type]) >= batch_size:
+                        put_rows(task_type, pending[task_type])
+                        pending[task_type] = []
+                    
+                    if counts[task_type] >= limits[task_type]:
+                        remaining.discard(task_type)
+                        if not remaining:
+                            break
+            finally:
+                cursor.close()
+                for task_type in limits:
+                    try:
+                        if pending[task_type]:
+                            put_rows(task_type, pending[task_type])
+                        put_rows(task_type, None)
+                    except Exception:
+                        # The writer died; its error is raised by future.result() below
+                        pass
+            
+            written = {task_type: future.result() for task_type, future in futures.items()}
+    except BaseException:
+        # Leave no partial exports behind
+        for tmp_file in tmp_files.values():
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        raise
+    
+    # The filename carries the final count, so rename once each writer has finished
+    results = {}
+    for task_type, count in written.items():
+        if count:
+            filename = with_compression(f"{task_type}_{count}.csv", compression)
+            os.replace(tmp_files[task_type], filename)
+            results[task_type] = (filename, count)
+        else:
+            os.remove(tmp_files[task_type])
+            results[task_type] = (None, 0)
+    return results
+
+def join_pipeline(task_type, limit):
+    """Aggregation joining OPEN tasks to their company, yielding _id (company_id) and short_name
+    
+    Needs MongoDB 5.0+ for $lookup with both localField and a pipeline.
+    """
+    return [
+        {"$match": {"status": "OPEN", "task_type": task_type}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "company_id": 1,
+            # company _ids are ObjectIds; tasks may hold them as hex strings
+            "company_key": {"$convert": {"input": "$company_id", "to": "objectId",
+                                         "onError": "$company_id", "onNull": None}},
+        }},
+        {"$lookup": {
+            "from": COMPANY_COLLECTION,
+            "localField": "company_key",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "short_name": 1}}],
+            "as": "company",
+        }},
+        {"$project": {
+            "_id": "$company_id",
+            "short_name": {"$ifNull": [{"$arrayElemAt": ["$company.short_name", 0]}, ""]},
+        }},
+    ]
+
+def export_with_urls(db, task_type, limit, batch_size=DEFAULT_BATCH_SIZE, compression=OUTPUT_COMPRESSION):
+    """Stream `_id, short_name, profile_url` rows for a task type's OPEN tasks from a server-side join
+    
+    Writes to a temporary file renamed to `{task_type}_{count}_with_urls_{timestamp}.csv`.
+    Returns (filename, count, without_short_name); filename is None when nothing matched.
+    """
+    cursor = db[COLLECTION_NAME].aggregate(join_pipeline(task_type, limit), allowDiskUse=True, batchSize=batch_size)
+    tmp_file = f"{task_type}_with_urls.csv.tmp"
+    count = 0
+    without_short_name = 0
+    
+    with open_csv(tmp_file, 'w', compression) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['_id', 'short_name', 'profile_url'])
+        for doc in cursor:
+            company_id = serialize_value(doc.get("_id", ""))
+            if company_id in ("", None):
+                continue
+            short_name = doc.get("short_name") or ""
+            # Same rule as generate_owler_profile_urls.py: no short_name, no URL
+            url = generate_profile_url(company_id, short_name) if short_name else ''
+            if not short_name:
+                without_short_name += 1
+            writer.writerow([company_id, short_name, url])
+            count += 1
+    
+    if not count:
+        os.remove(tmp_file)
+        return None, 0, 0
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = with_compression(f"{task_type}_{count}_with_urls_{timestamp}.csv", compression)
+    os.replace(tmp_file, filename)
+    return filename, count, without_short_name
+
+def parse_task_types(text, default_limit):
+    """Parse 'DESCRIPTION, LINKS:500' into {task_type: limit}; 'ALL' is expanded later"""
+    limits = {}
+    for item in text.split(","):
+        task_type, _, limit = item.strip().upper().partition(":")
+        if task_type:
+            limits[task_type.strip()] = int(limit) if limit.strip() else default_limit
+    return limits
 
 def connect_mongodb(uri, db_name):
     """Establish connection to MongoDB"""
@@ -89,6 +412,17 @@ def connect_mongodb(uri, db_name):
         return None, None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export OPEN company IDs from cp_task by task type")
+    parser.add_argument("--with-urls", action="store_true",
+                        help="join cp_task to company server-side and write _id, short_name, profile_url "
+                             "in one pass (no mapping file needed)")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=OUTPUT_COMPRESSION,
+                        help="write compressed CSVs (.csv.gz / .csv.zst), compressed on a background thread")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default=OUTPUT_FORMAT,
+                        help="single-type export format: csv, parquet (dictionary-encoded) or arrow "
+                             "(IPC, memory-mappable); multi-type and --with-urls exports are always CSV")
+    args = parser.parse_args()
+    
     script_start_time = time.time()
     
     print("=" * 60)
@@ -99,8 +433,8 @@ if __name__ == "__main__":
     print("\nEnter parameters:")
     
     try:
-        # Mandatory task_type
-        TASK_TYPE = input("Task Type (required): ").strip().upper()
+        # Mandatory task_type (several comma-separated, TYPE:LIMIT overrides, or ALL)
+        TASK_TYPE = input("Task Type (required, comma-separated or ALL for several): ").strip().upper()
         if not TASK_TYPE:
             print("\n✗ Task Type is required. Exiting.")
             exit(1)
@@ -109,11 +443,19 @@ if __name__ == "__main__":
         limit_input = input(f"Limit (press Enter for default: {DEFAULT_LIMIT}): ").strip()
         LIMIT = int(limit_input) if limit_input else DEFAULT_LIMIT
         
+        TASK_LIMITS = parse_task_types(TASK_TYPE, LIMIT)
+        MULTI_TYPE = TASK_TYPE == "ALL" or len(TASK_LIMITS) > 1 or ":" in TASK_TYPE
+        
         print("\n" + "=" * 60)
         print("Configuration:")
-        print(f"  Task Type: {TASK_TYPE}")
+        if MULTI_TYPE:
+            print(f"  Task Types: {TASK_TYPE if TASK_TYPE == 'ALL' else ', '.join(f'{t} ({n})' for t, n in TASK_LIMITS.items())}")
+        else:
+            print(f"  Task Type: {TASK_TYPE}")
         print(f"  Limit: {LIMIT}")
         print(f"  Status Filter: OPEN")
+        if args.with_urls:
+            print(f"  Output: _id, short_name, profile_url (joined with {COMPANY_COLLECTION})")
         print("=" * 60)
         
     except ValueError:
@@ -131,6 +473,36 @@ if __name__ == "__main__":
     try:
         collection = db[COLLECTION_NAME]
         
+        if TASK_TYPE == "ALL":
+            TASK_LIMITS = {task_type: LIMIT for task_type in sorted(collection.distinct("task_type", {"status": "OPEN"}))}
+            print(f"Found {len(TASK_LIMITS)} task types with OPEN tasks")
+            if not TASK_LIMITS:
+                print("⚠️  No OPEN task types found, nothing to export")
+                exit(0)
+        
+        if args.with_urls:
+            # The join runs per task type; each streams straight to its own URL file
+            for task_type, task_limit in TASK_LIMITS.items():
+                filename, count, without_short_name = export_with_urls(db, task_type, task_limit,
+                                                                       compression=args.compress)
+                if filename:
+                    print(f"✓ {task_type}: {count} rows exported to {filename}")
+                    if without_short_name:
+                        print(f"  ⚠️  {without_short_name} companies have no short_name (empty profile_url)")
+                else:
+                    print(f"⚠️  {task_type}: no results to export")
+            exit(0)
+        
+        if MULTI_TYPE:
+            # One scan of cp_task feeds every task type's CSV
+            results = export_task_types(collection, TASK_LIMITS, compression=args.compress)
+            for task_type, (filename, count) in results.items():
+                if filename:
+                    print(f"✓ {task_type}: {count} records exported to {filename}")
+                else:
+                    print(f"⚠️  {task_type}: no results to export")
+            exit(0)
+        
         # Execute query
         filter_query = {
           "status": "OPEN",
@@ -142,14 +514,19 @@ if __name__ == "__main__":
         }
         sort_order = {}
         
-        cursor = collection.find(filter_query, projection).limit(LIMIT)
+        cursor = collection.find(filter_query, projection).batch_size(DEFAULT_BATCH_SIZE).limit(LIMIT)
         
-        results = list(cursor)
-        print(f"Found {len(results)} documents\n")
+        # Stream straight from the cursor to the export file
+        if args.format == "csv":
+            filename, count, fieldnames = stream_to_csv(cursor, TASK_TYPE, projection, compression=args.compress)
+        else:
+            filename, count, fieldnames = stream_to_columnar(cursor, TASK_TYPE, args.format, projection)
+        print(f"Found {count} documents\n")
         
-        # Export to CSV
-        if results:
-            write_to_csv(results, COLLECTION_NAME, TASK_TYPE)
+        if filename:
+            print(f"✓ Data exported to {filename}")
+            print(f"  Total records: {count}")
+            print(f"  Fields: {len(fieldnames)}")
         else:
             print("No results to export")
     
@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 
+import argparse
 import csv
+import itertools
+import json
+import os
+import shutil
 import ssl
 import certifi
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from bson import ObjectId
 
+from compressed_io import open_csv, compression_for, with_compression
+from columnar_io import ColumnarWriter, columnar_format, with_format, iter_column_rows
+
 # Configuration
 # Replace with your MongoDB connection string:
 # MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
@@ -17,6 +27,16 @@ DATABASE_NAME = "owler"
 COLLECTION_NAME = "company"
 DEFAULT_LIMIT = 250000  # Default number of documents to fetch
 DEFAULT_BATCH_SIZE = 10000  # Default number of documents to fetch per batch
+DEFAULT_PARTITIONS = 1  # Number of parallel _id-range partitions (1 = single cursor)
+PARTITION_STRATEGY = "objectid"  # "objectid" (split on _id timestamps) or "bucketauto"
+WATERMARK_FILE = "company_id_short_name_watermark.json"  # Tracks the last exported snapshot
+UPDATED_AT_FIELD = None  # Set to the company modification-time field (e.g. "updated_at") to pick up renames
+OUTPUT_COMPRESSION = None  # "gzip" or "zstd" to write compressed snapshots (.csv.gz/.csv.zst); --compress overrides
+OUTPUT_FORMAT = "csv"  # "csv", "parquet" or "arrow" (columnar snapshots, read with column projection); --format overrides
+
+# Query shared by the single-cursor and partitioned exports
+SHORT_NAME_FILTER = {"short_name": {"$exists": True, "$nin": ["", None]}}
+SHORT_NAME_PROJECTION = {"_id": 1, "short_name": 1}
 
 def connect_mongodb(uri, db_name):
     """Establish connection to MongoDB"""
@@ -38,35 +58,366 @@ def connect_mongodb(uri, db_name):
         print(f"✗ Error: Cannot connect to MongoDB - {e}")
         return None, None
 
-def write_to_csv(data, filename):
-    """Write results to CSV file"""
-    if not data:
-        print("No data to write to CSV")
-        return
+def make_progress_reporter():
+    """Return a thread-safe callback that prints combined rows/sec across writers"""
+    lock = threading.Lock()
+    state = {"fetched": 0, "written": 0, "start": time.time()}
+    state["last_time"] = state["start"]
+    state["last_fetched"] = 0
     
-    try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # Write header
+    def report(fetched, written):
+        with lock:
+            state["fetched"] += fetched
+            state["written"] += written
+            now = time.time()
+            batch_rate = (state["fetched"] - state["last_fetched"]) / max(now - state["last_time"], 1e-9)
+            total_rate = state["fetched"] / max(now - state["start"], 1e-9)
+            print(f"  {state['fetched']:,} fetched, {state['written']:,} written "
+                  f"({batch_rate:,.0f} rows/s, avg {total_rate:,.0f} rows/s)")
+            state["last_time"] = now
+            state["last_fetched"] = state["fetched"]
+    
+    return report
+
+def stream_to_csv(cursor, filename, batch_size=DEFAULT_BATCH_SIZE, progress=None, header=True, compression=None):
+    """Stream cursor results to CSV batch by batch, keeping memory flat
+    
+    Compressed according to `compression`, or else the file extension; the
+    compression runs on a background thread so it overlaps the fetch.
+    """
+    if progress is None:
+        progress = make_progress_reporter()
+    
+    fetched = 0
+    written = 0
+    
+    with open_csv(filename, 'w', compression or compression_for(filename)) as csvfile:
+        writer = csv.writer(csvfile)
+        
+        # Write header
+        if header:
             writer.writerow(['company_id', 'short_name'])
+        
+        batch = []
+        batch_fetched = 0
+        for doc in cursor:
+            short_name = doc.get('short_name', '')
+            
+            # Skip if short_name is empty
+            if short_name:
+                batch.append([str(doc.get('_id', '')), short_name])
+            batch_fetched += 1
+            
+            if batch_fetched == batch_size:
+                writer.writerows(batch)
+                csvfile.flush()
+                progress(batch_fetched, len(batch))
+                fetched += batch_fetched
+                written += len(batch)
+                batch = []
+                batch_fetched = 0
+        
+        # Write the final partial batch
+        writer.writerows(batch)
+        fetched += batch_fetched
+        written += len(batch)
+    
+    return fetched, written
+
+def stream_to_columnar(cursor, filename, fmt, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Stream cursor results to a .parquet/.arrow snapshot, one row group per ROW_GROUP_SIZE rows"""
+    if progress is None:
+        progress = make_progress_reporter()
+    
+    fetched = 0
+    written = 0
+    
+    with ColumnarWriter(filename, ['company_id', 'short_name'], fmt) as writer:
+        batch = []
+        batch_fetched = 0
+        for doc in cursor:
+            short_name = doc.get('short_name', '')
             
-            # Write data (only documents with valid short_name)
-            for doc in data:
-                company_id = str(doc.get('_id', ''))
-                short_name = doc.get('short_name', '')
-                
-                # Skip if short_name is empty
+            # Skip if short_name is empty
+            if short_name:
+                batch.append((str(doc.get('_id', '')), short_name))
+            batch_fetched += 1
+            
+            if batch_fetched == batch_size:
+                writer.writerows(batch)
+                progress(batch_fetched, len(batch))
+                fetched += batch_fetched
+                written += len(batch)
+                batch = []
+                batch_fetched = 0
+        
+        # Write the final partial batch
+        writer.writerows(batch)
+        fetched += batch_fetched
+        written += len(batch)
+    
+    return fetched, written
+
+def snapshot_filename(count, timestamp, fmt="csv", compression=None):
+    """Versioned snapshot name; CSV snapshots may be compressed, columnar ones compress internally"""
+    filename = f"company_id_short_name_unique_{count}_{timestamp}.csv"
+    if fmt in (None, "csv"):
+        return with_compression(filename, compression)
+    return with_format(filename, fmt)
+
+def compute_id_boundaries(collection, filter_query, partitions, strategy=PARTITION_STRATEGY):
+    """Compute the inner _id boundaries that split the collection into partitions"""
+    if partitions <= 1:
+        return []
+    
+    if strategy == "objectid":
+        first = collection.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        last = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        if first is None:
+            return []
+        
+        if isinstance(first["_id"], ObjectId) and isinstance(last["_id"], ObjectId):
+            # Split evenly on the creation timestamp embedded in the ObjectId
+            start = first["_id"].generation_time.timestamp()
+            end = last["_id"].generation_time.timestamp()
+            step = (end - start) / partitions
+            boundaries = []
+            for i in range(1, partitions):
+                boundary = ObjectId.from_datetime(datetime.fromtimestamp(start + step * i, timezone.utc))
+                if not boundaries or boundary != boundaries[-1]:
+                    boundaries.append(boundary)
+            return boundaries
+        
+        print("⚠️  _id values are not ObjectIds, falling back to $bucketAuto")
+    
+    # Let the server pick evenly sized buckets over the matching _ids
+    pipeline = [
+        {"$match": filter_query},
+        {"$project": {"_id": 1}},
+        {"$bucketAuto": {"groupBy": "$_id", "buckets": partitions}},
+    ]
+    buckets = list(collection.aggregate(pipeline, allowDiskUse=True))
+    return [bucket["_id"]["min"] for bucket in buckets[1:]]
+
+def id_range_filter(filter_query, lower, upper):
+    """Restrict a filter to the half-open _id range [lower, upper)"""
+    id_range = {}
+    if lower is not None:
+        id_range["$gte"] = lower
+    if upper is not None:
+        id_range["$lt"] = upper
+    
+    ranged_query = dict(filter_query)
+    if id_range:
+        ranged_query["_id"] = id_range
+    return ranged_query
+
+def take_shared(cursor, budget):
+    """Yield documents while the LIMIT shared by all partitions lasts
+    
+    `budget` holds an itertools.count shared across threads (next() on it is
+    atomic), the limit, and a `truncated` flag set when a document is left behind.
+    """
+    for doc in cursor:
+        if next(budget["taken"]) >= budget["limit"]:
+            budget["truncated"] = True
+            return
+        yield doc
+
+def export_partition(collection, filter_query, lower, upper, budget, batch_size, part_file, progress):
+    """Export one _id range to a headerless part file, committed by rename on success"""
+    cursor = collection.find(
+        id_range_filter(filter_query, lower, upper),
+        SHORT_NAME_PROJECTION
+    ).batch_size(batch_size)
+    
+    tmp_file = f"{part_file}.tmp"
+    try:
+        fetched, written = stream_to_csv(take_shared(cursor, budget), tmp_file, batch_size,
+                                         progress=progress, header=False)
+    finally:
+        cursor.close()
+    os.replace(tmp_file, part_file)
+    return fetched, written
+
+def export_partitioned(collection, filter_query, filename, partitions, limit, batch_size):
+    """Export _id ranges in parallel and merge them into one CSV exactly once"""
+    boundaries = compute_id_boundaries(collection, filter_query, partitions)
+    
+    # Open-ended first and last ranges guarantee every _id falls in exactly one partition
+    edges = [None] + boundaries + [None]
+    ranges = list(zip(edges[:-1], edges[1:]))
+    print(f"  Split '{COLLECTION_NAME}' into {len(ranges)} _id range(s)")
+    
+    # Timestamp ranges differ a lot in size, so LIMIT is one budget shared by all of them
+    # rather than an even split that would truncate the dense (recent) ranges
+    budget = {"taken": itertools.count(), "limit": limit, "truncated": False}
+    part_files = [f"{filename}.part{i:03d}" for i in range(len(ranges))]
+    progress = make_progress_reporter()
+    
+    fetched = 0
+    written = 0
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(export_partition, collection, filter_query, lower, upper,
+                                budget, batch_size, part_files[i], progress)
+                for i, (lower, upper) in enumerate(ranges)
+            ]
+            for future in as_completed(futures):
+                part_fetched, part_written = future.result()
+                fetched += part_fetched
+                written += part_written
+        # LIMIT ran out while some partition still had documents
+        complete = not budget["truncated"]
+        
+        # Merge only once every partition has committed its part file
+        tmp_file = f"{filename}.tmp"
+        if columnar_format(filename):
+            with ColumnarWriter(tmp_file, ['company_id', 'short_name'], columnar_format(filename)) as writer:
+                for part_file in part_files:
+                    if os.path.exists(part_file):
+                        with open(part_file, 'r', newline='', encoding='utf-8') as part:
+                            writer.writerows(csv.reader(part))
+        else:
+            with open_csv(tmp_file, 'w', compression_for(filename)) as csvfile:
+                csv.writer(csvfile).writerow(['company_id', 'short_name'])
+                for part_file in part_files:
+                    if os.path.exists(part_file):
+                        with open(part_file, 'r', newline='', encoding='utf-8') as part:
+                            shutil.copyfileobj(part, csvfile)
+        os.replace(tmp_file, filename)
+    finally:
+        for part_file in part_files:
+            for path in (part_file, f"{part_file}.tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+        # Only left behind when the merge itself failed
+        if os.path.exists(f"{filename}.tmp"):
+            os.remove(f"{filename}.tmp")
+    
+    return fetched, written, complete
+
+def load_watermark(watermark_file=WATERMARK_FILE):
+    """Load the watermark recorded by the last complete export, if any"""
+    if not os.path.exists(watermark_file):
+        return None
+    
+    with open(watermark_file, 'r', encoding='utf-8') as file:
+        watermark = json.load(file)
+    
+    last_id = watermark.get("last_id")
+    if last_id and ObjectId.is_valid(last_id):
+        watermark["last_id"] = ObjectId(last_id)
+    if watermark.get("updated_at"):
+        watermark["updated_at"] = datetime.fromisoformat(watermark["updated_at"])
+    return watermark
+
+def capture_watermark(collection):
+    """Capture the highest _id and current time before an export starts"""
+    last = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return {
+        "last_id": last["_id"] if last else None,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+def save_watermark(watermark, snapshot_file, watermark_file=WATERMARK_FILE):
+    """Record the watermark and snapshot file for the next incremental run"""
+    data = {
+        "last_id": str(watermark["last_id"]) if watermark["last_id"] is not None else None,
+        "updated_at": watermark["updated_at"].isoformat(),
+        "snapshot": snapshot_file,
+    }
+    tmp_file = f"{watermark_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=2)
+    os.replace(tmp_file, watermark_file)
+    print(f"✓ Watermark saved to {watermark_file}")
+
+def fetch_delta(collection, watermark, batch_size=DEFAULT_BATCH_SIZE):
+    """Fetch short_names for companies created (or updated) since the watermark"""
+    conditions = []
+    if watermark.get("last_id") is not None:
+        conditions.append({"_id": {"$gt": watermark["last_id"]}})
+    if UPDATED_AT_FIELD and watermark.get("updated_at"):
+        conditions.append({UPDATED_AT_FIELD: {"$gte": watermark["updated_at"]}})
+    
+    delta_query = {"$or": conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+    cursor = collection.find(delta_query, SHORT_NAME_PROJECTION).batch_size(batch_size)
+    
+    # An empty short_name in the delta removes the company from the mapping
+    delta = {}
+    for doc in cursor:
+        delta[str(doc["_id"])] = doc.get("short_name") or ""
+    return delta
+
+def iter_snapshot_rows(snapshot_file):
+    """Yield [company_id, short_name] rows from a CSV (plain, .gz, .zst) or .parquet/.arrow snapshot"""
+    if columnar_format(snapshot_file):
+        yield from iter_column_rows(snapshot_file, ['company_id', 'short_name'])
+        return
+    with open_csv(snapshot_file) as previous:
+        reader = csv.reader(previous)
+        next(reader, None)
+        for row in reader:
+            if row:
+                yield row
+
+def merge_delta_into_snapshot(previous_file, delta, timestamp, compression=None, fmt=None):
+    """Stream the previous snapshot, apply the delta and write a new versioned snapshot
+    
+    The new snapshot uses `fmt` and `compression`, or else the previous
+    snapshot's format and compression.
+    """
+    pending = dict(delta)
+    written = 0
+    fmt = fmt or columnar_format(previous_file) or "csv"
+    compression = compression or compression_for(previous_file)
+    
+    tmp_file = snapshot_filename("delta", timestamp, fmt, compression) + ".tmp"
+    if fmt == "csv":
+        csvfile = open_csv(tmp_file, 'w', compression)
+        writer = csv.writer(csvfile)
+        writer.writerow(['company_id', 'short_name'])
+    else:
+        csvfile = None
+        writer = ColumnarWriter(tmp_file, ['company_id', 'short_name'], fmt)
+    
+    try:
+        # Rewrite existing rows, replacing renamed companies in place
+        for row in iter_snapshot_rows(previous_file):
+            company_id = row[0]
+            if company_id in pending:
+                short_name = pending.pop(company_id)
                 if short_name:
                     writer.writerow([company_id, short_name])
+                    written += 1
+            else:
+                writer.writerow(row)
+                written += 1
         
-        print(f"✓ Data exported to {filename}")
-        print(f"  Total records: {len(data)}")
-        
-    except Exception as e:
-        print(f"✗ Error writing to CSV: {e}")
+        # Append companies that were not in the previous snapshot
+        for company_id, short_name in pending.items():
+            if short_name:
+                writer.writerow([company_id, short_name])
+                written += 1
+    finally:
+        (csvfile or writer).close()
+    
+    filename = snapshot_filename(written, timestamp, fmt, compression)
+    os.replace(tmp_file, filename)
+    return filename, written
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export company _id and short_name pairs to a CSV snapshot")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=OUTPUT_COMPRESSION,
+                        help="write a compressed snapshot (.csv.gz / .csv.zst), compressed on a background thread")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"],
+                        help=f"snapshot format: csv, parquet (dictionary-encoded) or arrow (IPC, memory-mappable); "
+                             f"default: {OUTPUT_FORMAT}, or the previous snapshot's in incremental mode. "
+                             f"Columnar snapshots ignore --compress")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("MongoDB Company ID and Short Name Fetcher")
     print("=" * 60)
@@ -74,19 +425,36 @@ if __name__ == "__main__":
     # Get input parameters
     print("\nEnter parameters (press Enter to use defaults):")
     
+    INCREMENTAL = False
     try:
-        limit_input = input(f"Limit (default: {DEFAULT_LIMIT}): ").strip()
-        LIMIT = int(limit_input) if limit_input else DEFAULT_LIMIT
+        watermark = load_watermark()
+        if watermark and os.path.exists(watermark.get("snapshot", "")):
+            print(f"Last snapshot: {watermark['snapshot']}")
+            incremental_input = input("Incremental update from last snapshot? (yes/no, default: no): ").strip().lower()
+            INCREMENTAL = incremental_input in ['yes', 'y']
+        
+        LIMIT = DEFAULT_LIMIT
+        PARTITIONS = DEFAULT_PARTITIONS
+        if not INCREMENTAL:
+            limit_input = input(f"Limit (default: {DEFAULT_LIMIT}): ").strip()
+            LIMIT = int(limit_input) if limit_input else DEFAULT_LIMIT
         
-        # batch_input = input(f"Batch Size (default: {DEFAULT_BATCH_SIZE}): ").strip()
-        # BATCH_SIZE = int(batch_input) if batch_input else DEFAULT_BATCH_SIZE
+        batch_input = input(f"Batch Size (default: {DEFAULT_BATCH_SIZE}): ").strip()
+        BATCH_SIZE = int(batch_input) if batch_input else DEFAULT_BATCH_SIZE
         
-        print(f"\nUsing LIMIT: {LIMIT}")
-        # print(f"\nUsing LIMIT: {LIMIT}, BATCH_SIZE: {BATCH_SIZE}")
+        if not INCREMENTAL:
+            partitions_input = input(f"Parallel Partitions (default: {DEFAULT_PARTITIONS}): ").strip()
+            PARTITIONS = int(partitions_input) if partitions_input else DEFAULT_PARTITIONS
+        
+        if INCREMENTAL:
+            print(f"\nUsing incremental mode, BATCH_SIZE: {BATCH_SIZE}")
+        else:
+            print(f"\nUsing LIMIT: {LIMIT}, BATCH_SIZE: {BATCH_SIZE}, PARTITIONS: {PARTITIONS}")
     except ValueError:
         print("\n✗ Invalid input. Using default values.")
         LIMIT = DEFAULT_LIMIT
         BATCH_SIZE = DEFAULT_BATCH_SIZE
+        PARTITIONS = DEFAULT_PARTITIONS
     except KeyboardInterrupt:
         print("\n✗ Cancelled by user.")
         exit(1)
@@ -101,39 +469,86 @@ if __name__ == "__main__":
     try:
         collection = db[COLLECTION_NAME]
         
-        # Execute query to get all _id and short_name pairs
-        print(f"\nStep 2: Fetching documents from '{COLLECTION_NAME}' collection...")
-        print(f"Getting all company IDs with their short_names (limit: {LIMIT})")
-        # print(f"Getting all company IDs with their short_names (limit: {LIMIT}, batch size: {BATCH_SIZE})")
+        if INCREMENTAL:
+            # Fetch only the delta since the last snapshot and merge it in
+            print(f"\nStep 2: Fetching changes since {watermark['last_id']}...")
+            start_time = time.time()
+            next_watermark = capture_watermark(collection)
+            delta = fetch_delta(collection, watermark, BATCH_SIZE)
+            print(f"✓ Fetched {len(delta)} new or updated companies in {time.time() - start_time:.2f} seconds")
+            
+            print(f"\nStep 3: Merging delta into {watermark['snapshot']}...")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename, written = merge_delta_into_snapshot(watermark["snapshot"], delta, timestamp,
+                                                          args.compress, args.format)
+            save_watermark(next_watermark, filename)
+            
+            print(f"✓ Data exported to {filename}")
+            print(f"  Total records: {written}")
+            print(f"\n{'=' * 60}")
+            print("✓ SUCCESS!")
+            print(f"{'=' * 60}")
+            exit(0)
+        
+        # Stream all _id and short_name pairs straight to the snapshot file
+        output_format = args.format or OUTPUT_FORMAT
+        print(f"\nStep 2: Streaming documents from '{COLLECTION_NAME}' collection to {output_format.upper()}...")
+        print(f"Getting all company IDs with their short_names (limit: {LIMIT}, batch size: {BATCH_SIZE}, partitions: {PARTITIONS})")
         
-        start_time = time.time()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = snapshot_filename(LIMIT, timestamp, output_format, args.compress)
         
-        # Simple find query to get all documents with _id and short_name
-        cursor = collection.find(
-            {
-                "short_name": {"$exists": True, "$ne": "", "$ne": None}
-            },
-            {"_id": 1, "short_name": 1}
-        ).limit(LIMIT)
-        # ).batch_size(BATCH_SIZE).limit(LIMIT)
+        start_time = time.time()
+        next_watermark = capture_watermark(collection)
         
-        results = list(cursor)
+        if PARTITIONS > 1:
+            # Read disjoint _id ranges on parallel cursors
+            fetched, written, complete = export_partitioned(
+                collection, SHORT_NAME_FILTER, filename, PARTITIONS, LIMIT, BATCH_SIZE
+            )
+        else:
+            # Simple find query to get all documents with _id and short_name
+            cursor = collection.find(
+                SHORT_NAME_FILTER,
+                SHORT_NAME_PROJECTION
+            ).batch_size(BATCH_SIZE).limit(LIMIT)
+            
+            # Write under a temporary name so readers never pick up a partial snapshot
+            try:
+                if output_format == "csv":
+                    fetched, written = stream_to_csv(cursor, f"{filename}.tmp", BATCH_SIZE, compression=args.compress)
+                else:
+                    fetched, written = stream_to_columnar(cursor, f"{filename}.tmp", output_format, BATCH_SIZE)
+            except BaseException:
+                # Leave no partial snapshot behind
+                if os.path.exists(f"{filename}.tmp"):
+                    os.remove(f"{filename}.tmp")
+                raise
+            os.replace(f"{filename}.tmp", filename)
+            complete = fetched < LIMIT
         elapsed_time = time.time() - start_time
         
         print(f"\n✓ Query completed in {elapsed_time:.2f} seconds")
-        print(f"✓ Retrieved {len(results)} documents with short_names")
+        print(f"✓ Retrieved {fetched} documents with short_names")
         
-        if results:
-            # Export to CSV
-            print(f"\nStep 3: Writing results to CSV...")
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"company_id_short_name_unique_{LIMIT}_{timestamp}.csv"
-            write_to_csv(results, filename)
+        if written:
+            print(f"✓ Data exported to {filename}")
+            print(f"  Total records: {written}")
+            print(f"  Throughput: {fetched / max(elapsed_time, 1e-9):,.0f} rows/s")
+            
+            # Only a snapshot that covers the whole collection can seed incremental runs
+            if complete:
+                save_watermark(next_watermark, filename)
+            else:
+                print(f"⚠️  LIMIT ({LIMIT}) reached before every company was exported: the snapshot is partial "
+                      f"and no watermark was saved (raise the limit for a full snapshot)")
             
             print(f"\n{'=' * 60}")
             print("✓ SUCCESS!")
             print(f"{'=' * 60}")
         else:
+            if os.path.exists(filename):
+                os.remove(filename)
             print("\n⚠️  No results found")
     
     except Exception as e:
@@ -1,36 +1,89 @@
 #!/usr/bin/env python3
 
+import argparse
 import csv
+import gzip
 import time
 import os
-import glob
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+from parallel_csv import parse_csv_chunks, non_empty_key_rows
+from lookup_client import daemon_available, fetch_mapping_from_daemon
+from compressed_io import open_csv, compression_for, with_compression, csv_stem, glob_csv
+from columnar_io import columnar_format, glob_columnar, read_columns, iter_column_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None  # Optional: the columnar path falls back to plain Python lists
 
 # Configuration
 INPUT_DIR = "/Users/deepan.muthusamy/Documents/CP_TASK/CSV_Reports/Output_CSV"
 OUTPUT_DIR = "/Users/deepan.muthusamy/Documents/CP_TASK/CSV_Reports/Output_CSV"
 BASE_URL = "https://www.owler.com/iaApp"
+SITEMAP_BASE_URL = "https://www.owler.com/sitemaps"  # Where the sitemap shards are served from (used in the index)
+SITEMAP_MAX_URLS = 50000  # Sitemap protocol limit per file
+SITEMAP_WORKERS = 4  # Shards compressed and written concurrently
 
 def read_company_data_from_csv(csv_file):
     """Read company IDs and short names from CSV file"""
     company_data = []
     try:
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                company_id = row.get('_id', '').strip()
-                short_name = row.get('short_name', '').strip()
-                if company_id:  # Only require company_id, short_name can be empty
-                    company_data.append({
-                        '_id': company_id,
-                        'short_name': short_name
-                    })
+        if columnar_format(csv_file):
+            company_data = [{'_id': company_id.strip(), 'short_name': short_name.strip()}
+                            for company_id, short_name in iter_column_rows(csv_file, ['_id', 'short_name'])
+                            if company_id.strip()]
+        else:
+            # Only require company_id, short_name can be empty
+            for chunk in parse_csv_chunks(csv_file, ['_id', 'short_name'], non_empty_key_rows):
+                company_data.extend({'_id': company_id, 'short_name': short_name}
+                                    for company_id, short_name in chunk)
         print(f"✓ Read {len(company_data)} records from {os.path.basename(csv_file)}")
         return company_data
     except Exception as e:
         print(f"✗ Error reading CSV file: {e}")
         return []
 
+def read_company_columns(csv_file):
+    """Read the _id and short_name columns as two parallel sequences (Arrow arrays when available)"""
+    try:
+        table = None
+        if columnar_format(csv_file):
+            # Parquet/Arrow IPC: read just the two columns, memory-mapped (read_columns reports a missing pyarrow)
+            table = read_columns(csv_file, ['_id', 'short_name'])
+        elif pa is not None:
+            try:
+                table = pa_csv.read_csv(csv_file, convert_options=pa_csv.ConvertOptions(
+                    include_columns=['_id', 'short_name'],
+                    include_missing_columns=True,
+                    column_types={'_id': pa.string(), 'short_name': pa.string()},
+                    strings_can_be_null=False,
+                ))
+            except pa.ArrowInvalid as e:
+                # Arrow rejects ragged rows (missing or extra fields) that the csv module reads fine
+                print(f"⚠️  Arrow CSV reader failed ({e}), reading {os.path.basename(csv_file)} with the csv module")
+        
+        if table is not None:
+            ids = pc.utf8_trim_whitespace(table.column('_id').combine_chunks().fill_null(''))
+            names = pc.utf8_trim_whitespace(table.column('short_name').combine_chunks().fill_null(''))
+            # Only require company_id, short_name can be empty
+            keep = pc.not_equal(ids, '')
+            ids, names = ids.filter(keep), names.filter(keep)
+        else:
+            ids, names = [], []
+            for chunk in parse_csv_chunks(csv_file, ['_id', 'short_name'], non_empty_key_rows):
+                ids.extend(company_id for company_id, _ in chunk)
+                names.extend(short_name for _, short_name in chunk)
+        print(f"✓ Read {len(ids)} records from {os.path.basename(csv_file)}")
+        return ids, names
+    except Exception as e:
+        print(f"✗ Error reading CSV file: {e}")
+        return [], []
+
 def generate_profile_url(company_id, short_name):
     """Generate Owler profile URL from company_id and short_name"""
     # Replace spaces with hyphens in short_name
@@ -55,6 +108,39 @@ def generate_urls_from_data(company_data):
             })
     return results
 
+def generate_url_columns(ids, names):
+    """Generate the profile_url column for parallel _id/short_name columns
+    
+    Same rule as generate_profile_url, applied with vectorized string
+    kernels on Arrow arrays, or a single list comprehension otherwise.
+    Returns (ids, names, urls) as lists ready to be zipped into CSV rows.
+    """
+    if pa is not None and isinstance(ids, pa.Array):
+        slugs = pc.binary_join_element_wise(pc.replace_substring(names, ' ', '-'), '-company-profile', '')
+        urls = pc.binary_join_element_wise(BASE_URL, ids, slugs, '/')
+        # Generate URL only if short_name exists
+        urls = pc.if_else(pc.not_equal(names, ''), urls, '')
+        return ids.to_pylist(), names.to_pylist(), urls.to_pylist()
+    
+    prefix = f"{BASE_URL}/"
+    urls = [f"{prefix}{company_id}/{short_name.replace(' ', '-')}-company-profile" if short_name else ''
+            for company_id, short_name in zip(ids, names)]
+    return list(ids), list(names), urls
+
+def write_url_columns(ids, names, urls, filename):
+    """Write _id/short_name/profile_url columns to CSV without building per-row dicts"""
+    try:
+        with open_csv(filename, 'w') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['_id', 'short_name', 'profile_url'])
+            writer.writerows(zip(ids, names, urls))
+        
+        print(f"✓ Data exported to {filename}")
+        print(f"  Total records: {len(ids)}")
+        
+    except Exception as e:
+        print(f"✗ Error writing to CSV: {e}")
+
 def write_to_csv(data, filename):
     """Write results to CSV file"""
     if not data:
@@ -62,7 +148,7 @@ def write_to_csv(data, filename):
         return
     
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        with open_csv(filename, 'w') as csvfile:
             writer = csv.writer(csvfile)
             
             # Write header
@@ -78,7 +164,105 @@ def write_to_csv(data, filename):
     except Exception as e:
         print(f"✗ Error writing to CSV: {e}")
 
+def sitemap_loc(url):
+    """Percent-encode a profile URL (spaces, non-ASCII) and XML-escape it for a <loc> element"""
+    return escape(quote(url, safe=":/?#[]@!$&'()*+,;=%~"), {"'": "&apos;", '"': "&quot;"})
+
+def write_sitemap_shard(path, urls):
+    """Write one gzip-compressed sitemap file"""
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        file.writelines(f"<url><loc>{sitemap_loc(url)}</loc></url>\n" for url in urls)
+        file.write('</urlset>\n')
+    return path
+
+def write_sitemaps(urls, sitemap_dir, name, max_urls=SITEMAP_MAX_URLS, workers=SITEMAP_WORKERS,
+                   base_url=SITEMAP_BASE_URL):
+    """Stream URLs into gzip sitemap shards of at most max_urls each, plus a sitemap index
+    
+    One pass over `urls` (any iterable; empty URLs are skipped). Full shards
+    are handed to a thread pool as they fill, with at most `workers` in
+    flight, so memory stays bounded. Returns (index_path, shard_count, url_count).
+    """
+    os.makedirs(sitemap_dir, exist_ok=True)
+    shard_names = []
+    url_count = 0
+    pending = set()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(shard):
+            shard_name = f"{name}_sitemap_{len(shard_names) + 1:05d}.xml.gz"
+            shard_names.append(shard_name)
+            pending.add(executor.submit(write_sitemap_shard, os.path.join(sitemap_dir, shard_name), shard))
+            if len(pending) >= workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    pending.remove(future)
+        
+        shard = []
+        for url in urls:
+            if not url:
+                continue
+            shard.append(url)
+            url_count += 1
+            if len(shard) >= max_urls:
+                submit(shard)
+                shard = []
+        if shard:
+            submit(shard)
+        for future in pending:
+            future.result()
+    
+    lastmod = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    index_path = os.path.join(sitemap_dir, f"{name}_sitemap_index.xml")
+    with open(index_path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for shard_name in shard_names:
+            loc = sitemap_loc(f"{base_url.rstrip('/')}/{shard_name}")
+            file.write(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>\n")
+        file.write('</sitemapindex>\n')
+    return index_path, len(shard_names), url_count
+
+def fill_missing_short_names(company_data):
+    """Fill empty short_names in place from the lookup daemon, if it is running"""
+    missing = [data['_id'] for data in company_data if not data.get('short_name')]
+    if not missing:
+        return 0
+    
+    health = daemon_available()
+    if not health:
+        print("⚠️  Lookup daemon is not running, leaving empty short_names as they are")
+        return 0
+    
+    resolved = fetch_mapping_from_daemon(missing)
+    for data in company_data:
+        if not data.get('short_name') and data['_id'] in resolved:
+            data['short_name'] = resolved[data['_id']]
+    print(f"✓ Filled {len(resolved)} of {len(missing)} empty short_names via lookup daemon ({health['snapshot']})")
+    return len(resolved)
+
+def write_sitemap_output(urls, sitemap_dir, name):
+    """Write sitemap shards and report where they went"""
+    print(f"\nStep 4: Writing sitemap shards...")
+    start_time = time.time()
+    index_path, shards, url_count = write_sitemaps(urls, sitemap_dir, name)
+    print(f"✓ Wrote {url_count} URLs to {shards} sitemap shard(s) in {time.time() - start_time:.2f} seconds")
+    print(f"  Sitemap index: {index_path}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Owler profile URLs")
+    parser.add_argument("--fill-missing", action="store_true",
+                        help="resolve empty short_names through the lookup daemon before generating URLs")
+    parser.add_argument("--sitemap", metavar="DIR",
+                        help=f"also write the URLs as gzip sitemap shards (max {SITEMAP_MAX_URLS:,} URLs each) "
+                             "plus a sitemap index into DIR")
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="compress the output CSV (default: same compression as the input file)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Company Profile URL Generator")
     print("=" * 60)
@@ -89,11 +273,12 @@ if __name__ == "__main__":
         exit(1)
     
     # Get all CSV files from Output_CSV directory
-    csv_files = glob.glob(os.path.join(INPUT_DIR, "*_output_*.csv"))
+    input_pattern = os.path.join(INPUT_DIR, "*_output_*.csv")
+    csv_files = sorted(set(glob_csv(input_pattern) + glob_columnar(input_pattern)))
     
     if not csv_files:
         print(f"\n✗ No output CSV files found in {INPUT_DIR}")
-        print("Looking for files matching pattern: *_output_*.csv")
+        print("Looking for files matching pattern: *_output_*.csv (or .parquet/.arrow)")
         exit(1)
     
     print(f"\nFound {len(csv_files)} CSV file(s) in output directory:")
@@ -118,6 +303,43 @@ if __name__ == "__main__":
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     try:
+        if not args.fill_missing:
+            # Columnar path: no per-row dicts from reading to writing
+            print(f"\nStep 1: Reading company data from CSV...")
+            ids, names = read_company_columns(selected_file)
+            
+            if not len(ids):
+                print("\n✗ No company data found in CSV file")
+                exit(1)
+            
+            print(f"\nStep 2: Generating profile URLs{' (vectorized with pyarrow)' if pa is not None else ''}...")
+            start_time = time.time()
+            ids, names, urls = generate_url_columns(ids, names)
+            elapsed_time = time.time() - start_time
+            
+            print(f"✓ URL generation completed in {elapsed_time:.2f} seconds")
+            print(f"✓ Generated {len(urls)} profile URLs")
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            input_basename = csv_stem(selected_file)
+            output_filename = with_compression(os.path.join(OUTPUT_DIR, f"{input_basename}_with_urls_{timestamp}.csv"),
+                                               args.compress or compression_for(selected_file))
+            
+            print(f"\nStep 3: Writing results to CSV...")
+            write_url_columns(ids, names, urls, output_filename)
+            
+            if args.sitemap:
+                write_sitemap_output(urls, args.sitemap, input_basename)
+            
+            print(f"\nSummary:")
+            print(f"  Total records processed: {len(urls)}")
+            print(f"  Output file: {output_filename}")
+            
+            print(f"\n{'=' * 60}")
+            print("✓ SUCCESS!")
+            print(f"{'=' * 60}")
+            exit(0)
+        
         # Read company data from CSV
         print(f"\nStep 1: Reading company data from CSV...")
         company_data = read_company_data_from_csv(selected_file)
@@ -126,6 +348,9 @@ if __name__ == "__main__":
             print("\n✗ No company data found in CSV file")
             exit(1)
         
+        if args.fill_missing:
+            fill_missing_short_names(company_data)
+        
         # Generate profile URLs
         print(f"\nStep 2: Generating profile URLs...")
         start_time = time.time()
@@ -138,13 +363,17 @@ if __name__ == "__main__":
         if all_results:
             # Generate output filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            input_basename = os.path.splitext(os.path.basename(selected_file))[0]
-            output_filename = os.path.join(OUTPUT_DIR, f"{input_basename}_with_urls_{timestamp}.csv")
+            input_basename = csv_stem(selected_file)
+            output_filename = with_compression(os.path.join(OUTPUT_DIR, f"{input_basename}_with_urls_{timestamp}.csv"),
+                                               args.compress or compression_for(selected_file))
             
             # Export to CSV
             print(f"\nStep 3: Writing results to CSV...")
             write_to_csv(all_results, output_filename)
             
+            if args.sitemap:
+                write_sitemap_output((r['profile_url'] for r in all_results), args.sitemap, input_basename)
+            
             print(f"\nSummary:")
             print(f"  Total records processed: {len(all_results)}")
             print(f"  Output file: {output_filename}")
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import json
+import sys
+import ssl
+import certifi
+import time
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, OperationFailure
+
+from export_company_shortnames import SHORT_NAME_FILTER, SHORT_NAME_PROJECTION
+from update_task_status import (
+    OLD_STATUS, NEW_STATUS, COUNT_INDEX_HINT, UPDATE_INDEX_HINT, MAX_UPDATE_BATCH_SIZE, company_ids_filter,
+)
+
+# Configuration
+# Replace with your MongoDB connection string:
+# MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
+MONGODB_URI = ""
+DATABASE_NAME = "owler"
+TASK_COLLECTION = "cp_task"
+COMPANY_COLLECTION = "company"
+DEFAULT_TASK_TYPE = "DESCRIPTION"  # Task type used to fill in the cp_task query shapes
+SAMPLE_COMPANY_IDS = 100  # Company IDs sampled for the --input-file update shape
+
+# Operators that ESR treats as a range (everything else on a field is an equality match)
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$exists", "$regex", "$not"}
+
+
+def connect_mongodb(uri, db_name):
+    """Establish connection to MongoDB"""
+    try:
+        # Use certifi for SSL certificate verification on macOS
+        client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=5000,
+            tlsCAFile=certifi.where()
+        )
+        client.admin.command('ping')
+        db = client[db_name]
+        print(f"✓ Connected to {db_name}")
+        return client, db
+    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+        print(f"✗ Error: Cannot connect to MongoDB - {e}")
+        return None, None
+
+def query_shapes(task_type, sample_ids):
+    """The find, count and update shapes the scripts run, filled in with sample values
+
+    Each shape is a dict with the collection, the explain command, and the
+    filter/projection/sort the index suggestion is derived from.
+    """
+    shapes = []
+
+    def add(name, script, collection, command, filter_query, projection=None, sort=None):
+        shapes.append({
+            "name": name, "script": script, "collection": collection, "command": command,
+            "filter": filter_query, "projection": projection or {}, "sort": sort or [],
+            # Writes always fetch the documents they modify, so only reads can be index-only
+            "coverable": "update" not in command,
+        })
+
+    def find(collection, filter_query, projection, sort=None, limit=None, **options):
+        command = {"find": collection, "filter": filter_query, "projection": projection}
+        if sort:
+            command["sort"] = dict(sort)
+        if limit:
+            command["limit"] = limit
+        command.update(options)
+        return command
+
+    export_filter = {"status": "OPEN", "task_type": task_type}
+    export_projection = {"company_id": 1, "_id": 0}
+    add("Export one task type", "export_company_ids_by_task.py", TASK_COLLECTION,
+        find(TASK_COLLECTION, export_filter, export_projection), export_filter, export_projection)
+
+    multi_filter = {"status": "OPEN", "task_type": {"$in": [task_type]}}
+    multi_projection = {"company_id": 1, "task_type": 1, "_id": 0}
+    add("Export several task types", "export_company_ids_by_task.py", TASK_COLLECTION,
+        find(TASK_COLLECTION, multi_filter, multi_projection), multi_filter, multi_projection)
+
+    add("Export short names", "export_company_shortnames.py", COMPANY_COLLECTION,
+        find(COMPANY_COLLECTION, SHORT_NAME_FILTER, SHORT_NAME_PROJECTION),
+        SHORT_NAME_FILTER, SHORT_NAME_PROJECTION)
+
+    update_filter = {"status": OLD_STATUS, "task_type": task_type}
+    # count_documents runs this aggregate rather than the count command, and may be planned differently
+    command = {"aggregate": TASK_COLLECTION, "cursor": {}, "pipeline": [
+        {"$match": update_filter},
+        {"$group": {"_id": 1, "n": {"$sum": 1}}},
+    ]}
+    if COUNT_INDEX_HINT:
+        command["hint"] = dict(COUNT_INDEX_HINT)
+    add("Count tasks to update", "update_task_status.py", TASK_COLLECTION, command, update_filter)
+
+    # The single cursor iter_matching_ids opens to feed batched updates
+    ids_sort = [("_id", 1)]
+    options = {"batchSize": MAX_UPDATE_BATCH_SIZE, "allowDiskUse": True}
+    if UPDATE_INDEX_HINT:
+        options["hint"] = dict(UPDATE_INDEX_HINT)
+    add("_id cursor feeding batched updates", "update_task_status.py", TASK_COLLECTION,
+        find(TASK_COLLECTION, update_filter, {"_id": 1}, ids_sort, **options),
+        update_filter, {"_id": 1}, ids_sort)
+
+    update = {"$set": {"status": NEW_STATUS}}
+    add("Update by task type", "update_task_status.py", TASK_COLLECTION,
+        {"update": TASK_COLLECTION, "updates": [{"q": update_filter, "u": update, "multi": True}]},
+        update_filter)
+
+    ids_filter = company_ids_filter(task_type, sample_ids)
+    add("Update from --input-file", "update_task_status.py", TASK_COLLECTION,
+        {"update": TASK_COLLECTION, "updates": [{"q": ids_filter, "u": update, "multi": True}]},
+        ids_filter)
+
+    return shapes
+
+def iter_plan_stages(stage):
+    """Walk an explain plan tree depth-first"""
+    if not stage:
+        return
+    yield stage
+    for key in ("inputStage", "queryPlan"):
+        yield from iter_plan_stages(stage.get(key))
+    for child in stage.get("inputStages", []):
+        yield from iter_plan_stages(child)
+    for shard in stage.get("shards", []):
+        yield from iter_plan_stages(shard.get("winningPlan"))
+
+def summarize_explain(explain):
+    """Pull the index used, keys/docs examined and coverage out of an explain result"""
+    if "queryPlanner" not in explain and explain.get("stages"):
+        # Aggregate explains nest the query plan in their first ($cursor) stage
+        explain = explain["stages"][0].get("$cursor", {})
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = list(iter_plan_stages(winning_plan))
+    stage_names = [stage.get("stage") for stage in stages]
+    indexes = sorted({stage["indexName"] for stage in stages if stage.get("indexName")})
+    stats = explain.get("executionStats", {})
+    docs_examined = stats.get("totalDocsExamined", 0)
+    uses_index = any(name in ("IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN", "IDHACK", "EXPRESS_IXSCAN")
+                     for name in stage_names)
+    return {
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stage_names,
+        "stages": stage_names,
+        "returned": stats.get("nReturned", 0),
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": docs_examined,
+        "time_ms": stats.get("executionTimeMillis", 0),
+        # Index-only: answered from index keys without fetching a single document
+        "covered": uses_index and docs_examined == 0 and "FETCH" not in stage_names,
+    }
+
+def suggest_index(filter_query, projection, sort):
+    """Suggest an Equality-Sort-Range compound index, extended with projected fields to cover the query"""
+    equality, ranges = [], []
+    for field, condition in filter_query.items():
+        if field.startswith("$"):
+            continue
+        if isinstance(condition, dict) and set(condition) & RANGE_OPERATORS:
+            ranges.append(field)
+        else:
+            equality.append(field)
+
+    keys = []
+    for field in equality + [field for field, _ in sort] + ranges:
+        if field not in keys:
+            keys.append(field)
+
+    # Projected fields (and _id unless excluded) must be in the index for a covered query
+    covering = [field for field, value in projection.items() if value and field != "_id"]
+    if projection and projection.get("_id", 1):
+        covering.append("_id")
+    for field in covering:
+        if field not in keys:
+            keys.append(field)
+
+    directions = dict(sort)
+    return [(field, directions.get(field, 1)) for field in keys]
+
+def index_exists(collection, keys):
+    """Whether an existing index starts with the suggested keys"""
+    for info in collection.index_information().values():
+        if [tuple(key) for key in info["key"][:len(keys)]] == keys:
+            return True
+    return False
+
+def format_index(keys):
+    return "{" + ", ".join(f"{field}: {direction}" for field, direction in keys) + "}"
+
+def analyze_shape(db, shape):
+    """Explain one query shape with executionStats and attach an index suggestion"""
+    report = {"name": shape["name"], "script": shape["script"], "collection": shape["collection"],
+              "coverable": shape["coverable"]}
+    try:
+        try:
+            explain = db.command("explain", shape["command"], verbosity="executionStats")
+        except OperationFailure as e:
+            if "hint" not in shape["command"]:
+                raise
+            # The scripts fall back to an unhinted query when the hinted index is missing
+            report["hint_error"] = str(e)
+            command = {key: value for key, value in shape["command"].items() if key != "hint"}
+            explain = db.command("explain", command, verbosity="executionStats")
+        report.update(summarize_explain(explain))
+    except OperationFailure as e:
+        report["error"] = str(e)
+
+    suggestion = suggest_index(shape["filter"], shape["projection"], shape["sort"])
+    report["suggested_index"] = suggestion
+    report["suggested_index_exists"] = index_exists(db[shape["collection"]], suggestion)
+    return report
+
+def print_report(report):
+    print(f"\n{report['name']}  ({report['script']}, {report['collection']})")
+    if "hint_error" in report:
+        print(f"  ⚠️  Hinted index not usable ({report['hint_error']}), explained without the hint as the script runs it")
+    if "error" in report:
+        print(f"  ✗ Explain failed: {report['error']}")
+    else:
+        index = ", ".join(report["indexes"]) or "none"
+        print(f"  Index used: {index}{'  ⚠️  COLLECTION SCAN' if report['collection_scan'] else ''}")
+        print(f"  Returned: {report['returned']:,}  Keys examined: {report['keys_examined']:,}  "
+              f"Docs examined: {report['docs_examined']:,}  ({report['time_ms']} ms)")
+        if report["coverable"]:
+            print(f"  Covered (index-only): {'yes' if report['covered'] else 'no'}")
+        else:
+            print("  Covered (index-only): n/a for writes, the index only narrows the match")
+        print(f"  Plan: {' <- '.join(name for name in report['stages'] if name)}")
+
+    status = "exists" if report["suggested_index_exists"] else "missing"
+    print(f"  Suggested index: {format_index(report['suggested_index'])} ({status})")
+    if not report["suggested_index_exists"]:
+        keys = ", ".join(f'"{field}": {direction}' for field, direction in report["suggested_index"])
+        print(f"    db.{report['collection']}.createIndex({{{keys}}})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Explain the scripts' MongoDB queries and suggest indexes that make them index-only"
+    )
+    parser.add_argument("--task-type", default=DEFAULT_TASK_TYPE,
+                        help=f"task_type used in the cp_task query shapes (default: {DEFAULT_TASK_TYPE})")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    script_start_time = time.time()
+    task_type = args.task_type.strip().upper()
+
+    if not args.json:
+        print("=" * 60)
+        print("Index Advisor: explain(executionStats) for each query shape")
+        print("=" * 60)
+
+    # Keep stdout clean for JSON consumers
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        client, db = connect_mongodb(MONGODB_URI, DATABASE_NAME)
+    if db is None:
+        exit(1)
+
+    try:
+        # Real company IDs make the $in update shape representative
+        sample_ids = [doc["company_id"] for doc in db[TASK_COLLECTION].find(
+            {"status": OLD_STATUS, "task_type": task_type, "company_id": {"$exists": True}},
+            {"company_id": 1, "_id": 0}
+        ).limit(SAMPLE_COMPANY_IDS)] or [0]
+
+        reports = [analyze_shape(db, shape) for shape in query_shapes(task_type, sample_ids)]
+
+        if args.json:
+            print(json.dumps(reports, indent=2, default=str))
+        else:
+            for report in reports:
+                print_report(report)
+
+            reads = [r for r in reports if r["coverable"]]
+            print(f"\n{'=' * 60}")
+            print(f"{sum(1 for r in reads if r.get('covered'))}/{len(reads)} read shapes are index-only, "
+                  f"{sum(1 for r in reports if r.get('collection_scan'))} shapes scan the whole collection")
+
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    finally:
+        client.close()
+        if not args.json:
+            print("✓ Connection closed")
+            total_time = time.time() - script_start_time
+            print(f"\n{'=' * 60}")
+            print(f"Total execution time: {total_time:.2f} seconds")
+            print(f"{'=' * 60}")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import urllib.error
+import urllib.request
+
+# Configuration
+DAEMON_URL = "http://127.0.0.1:8765"  # Address of mapping_lookup_daemon.py
+DAEMON_BATCH_SIZE = 50000  # IDs per lookup request
+DAEMON_TIMEOUT = 60  # Seconds to wait for one lookup request
+
+
+def daemon_available(url=DAEMON_URL, timeout=0.5):
+    """Return the daemon's health info if it is running, otherwise None"""
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+def daemon_serving(mapping_file, url=DAEMON_URL):
+    """Return the daemon's health info if it is running and serves `mapping_file`, otherwise None
+    
+    The daemon serves whichever snapshot it found, so a daemon serving a
+    different file is ignored rather than silently switching data source.
+    """
+    health = daemon_available(url)
+    if health and health.get("snapshot") != os.path.basename(mapping_file):
+        print(f"⚠️  Lookup daemon serves {health.get('snapshot')}, not {os.path.basename(mapping_file)}; "
+              f"using the local mapping")
+        return None
+    return health
+
+def daemon_lookup(company_ids, url=DAEMON_URL, batch_size=DAEMON_BATCH_SIZE):
+    """Look up short_name and profile_url for company IDs in batches"""
+    results = []
+    for i in range(0, len(company_ids), batch_size):
+        body = json.dumps({"ids": company_ids[i:i + batch_size]}).encode('utf-8')
+        request = urllib.request.Request(
+            f"{url}/lookup", data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=DAEMON_TIMEOUT) as response:
+            results.extend(json.loads(response.read().decode('utf-8'))["results"])
+    return results
+
+def fetch_mapping_from_daemon(company_ids, url=DAEMON_URL):
+    """Return a company_id to short_name dict for the given IDs, resolved by the daemon"""
+    unique_ids = list(dict.fromkeys(company_ids))
+    return {r["_id"]: r["short_name"] for r in daemon_lookup(unique_ids, url) if r["short_name"]}
@@ -1,43 +1,445 @@
 #!/usr/bin/env python3
 
+import argparse
 import csv
 import time
 import os
-import glob
+import heapq
+import multiprocessing
+import sqlite3
+import tempfile
+import certifi
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from bson import ObjectId
+from parallel_csv import iter_csv_chunks, parse_csv_chunks, rows_to_dict, non_empty_first_column, non_empty_key_rows
+from lookup_client import daemon_serving, fetch_mapping_from_daemon
+from compressed_io import open_csv, compression_for, with_compression, strip_compression, csv_stem, glob_csv
+from columnar_io import columnar_format, glob_columnar, iter_column_rows, read_columns, lookup_subset
 
 # Configuration
+# Replace with your MongoDB connection string (only used for the database fallback):
+# MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
+MONGODB_URI = ""
+DATABASE_NAME = "owler"
+COLLECTION_NAME = "company"
 INPUT_DIR = "/Users/deepan.muthusamy/Documents/CP_TASK/CSV_Reports/Input_CSV"
 OUTPUT_DIR = "/Users/deepan.muthusamy/Documents/CP_TASK/CSV_Reports/Output_CSV"
-MAPPING_FILE = "company_id_short_name_unique_25000000_20251230_005529.csv"  # File containing company_id to short_name mapping
+MAPPING_FILE = "company_id_short_name_unique_25000000_20251230_005529.csv"  # File containing company_id to short_name mapping (.csv, .csv.gz/.zst, .parquet or .arrow)
+USE_MAPPING_STORE = True  # Look up IDs in an indexed SQLite store built from MAPPING_FILE instead of loading it all
+STORE_BATCH_SIZE = 100000  # Rows per insert batch when building the mapping store
+LOOKUP_CHUNK_SIZE = 900  # IDs per query when reading from the mapping store (SQLite variable limit)
+COMPACT_MAPPING = True  # Hold a full in-memory mapping as packed buffers instead of a dict of strings
+COMPACT_RUN_SIZE = 1000000  # Entries sorted per run while building a compact mapping
+DEFAULT_WORKERS = os.cpu_count() or 1  # Worker processes for batch mode
+FALLBACK_BATCH_SIZE = 1000  # IDs per $in query when resolving misses from the database
+FALLBACK_WORKERS = 4  # Concurrent $in queries when resolving misses from the database
+FALLBACK_CACHE_FILE = "short_name_fallback_cache.sqlite"  # On-disk cache of database-resolved short names
+EXTERNAL_SORT_CHUNK_SIZE = 1000000  # Rows held in memory per spilled run in sort-merge join mode
 
-def load_company_short_name_mapping(mapping_file):
+# Shared with batch workers; forked children see the parent's copy without reloading it
+_BATCH_MAPPING = None
+_BATCH_STORE_PATH = None
+_BATCH_COLUMNAR_MAPPING = None
+_BATCH_DAEMON = False
+_BATCH_FALLBACK = False
+_BATCH_COMPRESSION = None
+
+class CompactMapping:
+    """Read-only company_id to short_name mapping packed into a few flat buffers
+    
+    ObjectId hex strings are stored as sorted 12-byte keys and looked up by
+    binary search; short names live in one shared UTF-8 buffer addressed by
+    offsets. IDs that are not 24-character hex fall back to a small dict.
+    Supports the dict lookups the mapper uses: get(), `in`, [] and len().
+    """
+    
+    KEY_SIZE = 12
+    
+    def __init__(self, pairs, run_size=COMPACT_RUN_SIZE):
+        names = bytearray()
+        name_offsets = array('Q', [0])
+        runs = []
+        run = []
+        self._other = {}
+        
+        for company_id, short_name in pairs:
+            key = self._key(company_id)
+            if key is None:
+                self._other[company_id] = short_name
+                continue
+            
+            # Tag each key with its insertion index so duplicates resolve to the last row
+            run.append(key + (len(name_offsets) - 1).to_bytes(8, 'big'))
+            names += short_name.encode('utf-8')
+            name_offsets.append(len(names))
+            
+            if len(run) >= run_size:
+                runs.append(self._pack_run(run))
+                run = []
+        if run:
+            runs.append(self._pack_run(run))
+        
+        # Merge the sorted runs, rewriting names in key order into a fresh buffer
+        self._keys = bytearray()
+        self._names = bytearray()
+        self._offsets = array('Q', [0])
+        for record in heapq.merge(*(self._iter_run(r) for r in runs)):
+            key = record[:self.KEY_SIZE]
+            index = int.from_bytes(record[self.KEY_SIZE:], 'big')
+            name = names[name_offsets[index]:name_offsets[index + 1]]
+            
+            if len(self._keys) and self._keys[-self.KEY_SIZE:] == key:
+                # Duplicate ID: the later row replaces the earlier one
+                del self._names[self._offsets[-2]:]
+                self._offsets.pop()
+            else:
+                self._keys += key
+            self._names += name
+            self._offsets.append(len(self._names))
+        
+        self._keys = bytes(self._keys)
+        self._names = bytes(self._names)
+        self._count = len(self._keys) // self.KEY_SIZE
+    
+    @staticmethod
+    def _key(company_id):
+        # Only canonical lowercase ObjectId hex round-trips exactly through bytes
+        if len(company_id) != 24 or company_id != company_id.lower():
+            return None
+        try:
+            return bytes.fromhex(company_id)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _pack_run(run):
+        run.sort()
+        return b"".join(run)
+    
+    @classmethod
+    def _iter_run(cls, packed):
+        size = cls.KEY_SIZE + 8
+        for start in range(0, len(packed), size):
+            yield packed[start:start + size]
+    
+    def _find(self, company_id):
+        key = self._key(company_id)
+        if key is None:
+            return None
+        
+        keys = self._keys
+        size = self.KEY_SIZE
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            probe = keys[mid * size:(mid + 1) * size]
+            if probe < key:
+                low = mid + 1
+            elif probe > key:
+                high = mid
+            else:
+                return mid
+        return None
+    
+    def get(self, company_id, default=None):
+        index = self._find(company_id)
+        if index is None:
+            return self._other.get(company_id, default)
+        return self._names[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+    
+    def __getitem__(self, company_id):
+        missing = object()
+        value = self.get(company_id, missing)
+        if value is missing:
+            raise KeyError(company_id)
+        return value
+    
+    def __contains__(self, company_id):
+        return self._find(company_id) is not None or company_id in self._other
+    
+    def __len__(self):
+        return self._count + len(self._other)
+    
+    def __bool__(self):
+        return len(self) > 0
+
+def iter_mapping_rows(mapping_file):
+    """Yield stripped (company_id, short_name) pairs from the mapping file (CSV, .gz, .zst, .parquet or .arrow)"""
+    if columnar_format(mapping_file):
+        for company_id, short_name in iter_column_rows(mapping_file, ['company_id', 'short_name']):
+            company_id = company_id.strip()
+            if company_id:
+                yield company_id, short_name.strip()
+        return
+    with open_csv(mapping_file) as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            company_id = row.get('company_id', '').strip()
+            short_name = row.get('short_name', '').strip()
+            if company_id:
+                yield company_id, short_name
+
+def load_company_short_name_mapping(mapping_file, compact=False):
     """Load company_id to short_name mapping from CSV file"""
-    mapping = {}
     try:
-        with open(mapping_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                company_id = row.get('company_id', '').strip()
-                short_name = row.get('short_name', '').strip()
-                if company_id:
-                    mapping[company_id] = short_name
+        if compact and columnar_format(mapping_file):
+            # Stream rows so the packed structure is the only full copy in memory
+            mapping = CompactMapping(iter_mapping_rows(mapping_file))
+        elif compact:
+            # Parse chunks on all cores and pack each one as it arrives, in file order
+            chunks = iter_csv_chunks(mapping_file, ['company_id', 'short_name'], non_empty_key_rows)
+            mapping = CompactMapping(pair for rows in chunks for pair in rows)
+        elif columnar_format(mapping_file):
+            # Only the two projected columns are read; no CSV parsing involved
+            mapping = dict(iter_mapping_rows(mapping_file))
+        else:
+            # Parse chunks on all cores and merge the partial maps in file order
+            mapping = {}
+            for partial in parse_csv_chunks(mapping_file, ['company_id', 'short_name'], rows_to_dict):
+                mapping.update(partial)
         print(f"✓ Loaded {len(mapping)} company_id to short_name mappings from {os.path.basename(mapping_file)}")
         return mapping
     except Exception as e:
         print(f"✗ Error reading mapping file: {e}")
         return {}
 
-def read_company_ids_from_csv(csv_file):
-    """Read company IDs from CSV file"""
-    company_ids = []
+def mapping_store_path(mapping_file):
+    """Return the path of the indexed store built from a mapping CSV"""
+    return os.path.splitext(strip_compression(mapping_file))[0] + ".sqlite"
+
+def is_mapping_store_current(store_path, mapping_file):
+    """Check whether the store exists, is not empty and is newer than its mapping CSV"""
+    return (os.path.exists(store_path)
+            and os.path.getsize(store_path) > 0
+            and os.path.getmtime(store_path) >= os.path.getmtime(mapping_file))
+
+def ensure_mapping_store(mapping_file):
+    """Return the mapping store's path, building it first if it is missing or stale"""
+    store_path = mapping_store_path(mapping_file)
+    if not is_mapping_store_current(store_path, mapping_file):
+        print(f"  Building indexed mapping store (one-time step for this mapping file)...")
+        build_mapping_store(mapping_file, store_path)
+    return store_path
+
+def create_mapping_table(conn):
+    """Create the mapping table in a writable store if it does not exist yet"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS mapping (company_id TEXT PRIMARY KEY, short_name TEXT NOT NULL) WITHOUT ROWID"
+    )
+
+def save_to_mapping_store(conn, mapping):
+    """Insert or replace company_id to short_name pairs in a writable store"""
+    conn.executemany("INSERT OR REPLACE INTO mapping VALUES (?, ?)", mapping.items())
+    conn.commit()
+
+def open_columnar_mapping(mapping_file):
+    """Read the company_id and short_name columns of a .parquet/.arrow snapshot (Arrow IPC is memory-mapped)"""
+    return read_columns(mapping_file, ['company_id', 'short_name'])
+
+def load_columnar_subset(table, company_ids):
+    """Look up only the given company IDs in an opened columnar mapping"""
+    return lookup_subset(table, company_ids, 'company_id', 'short_name')
+
+def build_mapping_store(mapping_file, store_path, batch_size=STORE_BATCH_SIZE):
+    """Build a persistent SQLite store indexed by company_id from the mapping CSV"""
+    tmp_path = f"{store_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    
+    conn = sqlite3.connect(tmp_path)
     try:
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        create_mapping_table(conn)
+        
+        total = 0
+        with open_csv(mapping_file) as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            id_index = header.index('company_id')
+            name_index = header.index('short_name')
+            
+            batch = []
             for row in reader:
-                company_id = row.get('company_id', '').strip()
+                if len(row) <= max(id_index, name_index):
+                    continue
+                company_id = row[id_index].strip()
                 if company_id:
-                    company_ids.append(company_id)
+                    batch.append((company_id, row[name_index].strip()))
+                
+                if len(batch) >= batch_size:
+                    # Later rows win, matching the dict-based loader
+                    conn.executemany("INSERT OR REPLACE INTO mapping VALUES (?, ?)", batch)
+                    total += len(batch)
+                    batch = []
+                    print(f"  {total:,} rows indexed...")
+            
+            conn.executemany("INSERT OR REPLACE INTO mapping VALUES (?, ?)", batch)
+            total += len(batch)
+        
+        conn.commit()
+    finally:
+        conn.close()
+    
+    os.replace(tmp_path, store_path)
+    print(f"✓ Built mapping store {os.path.basename(store_path)} from {total} rows")
+
+def open_mapping_store(store_path):
+    """Open the mapping store read-only"""
+    return sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+
+def load_mapping_subset(conn, company_ids, chunk_size=LOOKUP_CHUNK_SIZE):
+    """Look up only the given company IDs in the mapping store"""
+    mapping = {}
+    unique_ids = list(dict.fromkeys(company_ids))
+    for i in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[i:i + chunk_size]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT company_id, short_name FROM mapping WHERE company_id IN ({placeholders})",
+            chunk
+        )
+        mapping.update(rows)
+    return mapping
+
+def connect_mongodb(uri, db_name):
+    """Establish connection to MongoDB"""
+    try:
+        client = MongoClient(
+            uri, 
+            serverSelectionTimeoutMS=30000,
+            connectTimeoutMS=30000,
+            socketTimeoutMS=120000,
+            tlsCAFile=certifi.where(),
+            maxPoolSize=50,
+            retryWrites=True
+        )
+        client.admin.command('ping')
+        db = client[db_name]
+        print(f"✓ Connected to {db_name}")
+        return client, db
+    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+        print(f"✗ Error: Cannot connect to MongoDB - {e}")
+        return None, None
+
+def fetch_short_names_batch(collection, company_ids):
+    """Resolve one batch of company IDs with a single $in query, keyed by the IDs as given"""
+    # str(ObjectId) is lowercase hex, so map each queried _id back to the caller's spelling(s) of it
+    query_ids = {}
+    originals = {}
+    for cid in company_ids:
+        query_id = ObjectId(cid) if ObjectId.is_valid(cid) else cid
+        query_ids[str(query_id)] = query_id
+        originals.setdefault(str(query_id), []).append(cid)
+    cursor = collection.find({"_id": {"$in": list(query_ids.values())}}, {"_id": 1, "short_name": 1})
+    return {cid: doc.get("short_name") or "" for doc in cursor for cid in originals.get(str(doc["_id"]), [])}
+
+def resolve_missing_from_db(collection, company_ids, batch_size=FALLBACK_BATCH_SIZE, workers=FALLBACK_WORKERS):
+    """Resolve company IDs against the company collection with concurrent batched $in queries"""
+    batches = [company_ids[i:i + batch_size] for i in range(0, len(company_ids), batch_size)]
+    resolved = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for found in executor.map(lambda batch: fetch_short_names_batch(collection, batch), batches):
+            resolved.update((cid, name) for cid, name in found.items() if name)
+    return resolved
+
+def read_fallback_cache(company_ids):
+    """Look IDs up in the fallback cache without creating or writing it"""
+    if not os.path.exists(FALLBACK_CACHE_FILE):
+        return {}
+    cache = sqlite3.connect(f"file:{FALLBACK_CACHE_FILE}?mode=ro", uri=True)
+    try:
+        return load_mapping_subset(cache, company_ids)
+    except sqlite3.OperationalError:
+        # The cache file exists but its table has not been created yet
+        return {}
+    finally:
+        cache.close()
+
+def save_fallback_results(from_db, store_path=None, write_back=False):
+    """Add database-resolved short names to the fallback cache, and with write_back to the mapping store"""
+    if not from_db:
+        return
+    cache = sqlite3.connect(FALLBACK_CACHE_FILE)
+    try:
+        create_mapping_table(cache)
+        save_to_mapping_store(cache, from_db)
+    finally:
+        cache.close()
+    
+    if write_back and store_path:
+        # mode=rw never creates the file, so a missing store cannot be left behind empty
+        store = sqlite3.connect(f"file:{store_path}?mode=rw", uri=True)
+        try:
+            save_to_mapping_store(store, from_db)
+        finally:
+            store.close()
+        print(f"  Wrote {len(from_db)} resolved IDs back to {os.path.basename(store_path)}")
+
+def apply_db_fallback(results, store_path=None, write_back=False, save=True):
+    """Fill empty short_names from the cache, then the database, updating results in place
+    
+    Returns the short names resolved from the database. With save=False they
+    are not written anywhere, so batch workers can hand them to the parent,
+    which writes the cache and store once instead of every worker at a time.
+    """
+    missing = list(dict.fromkeys(r["_id"] for r in results if not r.get("short_name")))
+    if not missing:
+        return {}
+    
+    resolved = read_fallback_cache(missing)
+    print(f"  {len(resolved)} of {len(missing)} missing IDs found in {FALLBACK_CACHE_FILE}")
+    
+    from_db = {}
+    uncached = [cid for cid in missing if cid not in resolved]
+    if uncached:
+        client, db = connect_mongodb(MONGODB_URI, DATABASE_NAME)
+        if db is None:
+            print("⚠️  Database fallback skipped")
+        else:
+            try:
+                from_db = resolve_missing_from_db(db[COLLECTION_NAME], uncached)
+            finally:
+                client.close()
+            print(f"  {len(from_db)} of {len(uncached)} remaining IDs resolved from '{COLLECTION_NAME}'")
+            resolved.update(from_db)
+    
+    if save:
+        save_fallback_results(from_db, store_path, write_back)
+    
+    for result in results:
+        if not result.get("short_name") and result["_id"] in resolved:
+            result["short_name"] = resolved[result["_id"]]
+    return from_db
+
+def iter_company_ids(csv_file):
+    """Yield company IDs from CSV file one at a time"""
+    if columnar_format(csv_file):
+        for (company_id,) in iter_column_rows(csv_file, ['company_id']):
+            company_id = company_id.strip()
+            if company_id:
+                yield company_id
+        return
+    with open_csv(csv_file) as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            company_id = row.get('company_id', '').strip()
+            if company_id:
+                yield company_id
+
+def read_company_ids_from_csv(csv_file):
+    """Read company IDs from CSV file"""
+    try:
+        if columnar_format(csv_file):
+            company_ids = list(iter_company_ids(csv_file))
+        else:
+            company_ids = []
+            for chunk in parse_csv_chunks(csv_file, ['company_id'], non_empty_first_column):
+                company_ids.extend(chunk)
         print(f"✓ Read {len(company_ids)} company IDs from {os.path.basename(csv_file)}")
         return company_ids
     except Exception as e:
@@ -62,7 +464,8 @@ def write_to_csv(data, filename):
         return
     
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        # Compressed on a background thread when the name ends in .gz/.zst
+        with open_csv(filename, 'w') as csvfile:
             writer = csv.writer(csvfile)
             
             # Write header
@@ -78,7 +481,237 @@ def write_to_csv(data, filename):
     except Exception as e:
         print(f"✗ Error writing to CSV: {e}")
 
+def spill_sorted_run(chunk, key, tmp_dir):
+    """Sort a chunk of rows and spill it to a temporary CSV run file"""
+    chunk.sort(key=key)
+    fd, path = tempfile.mkstemp(suffix=".csv", prefix="sort_run_", dir=tmp_dir)
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(chunk)
+    return path
+
+def external_sort(rows, key, chunk_size=EXTERNAL_SORT_CHUNK_SIZE, tmp_dir=None):
+    """Sort rows of strings with bounded memory by spilling sorted runs and merging them
+    
+    The sort is stable, so rows with equal keys keep their input order.
+    """
+    run_files = []
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            run_files.append(spill_sorted_run(chunk, key, tmp_dir))
+            chunk = []
+    
+    if not run_files:
+        # Everything fit in one chunk, no need to touch disk
+        chunk.sort(key=key)
+        yield from chunk
+        return
+    if chunk:
+        run_files.append(spill_sorted_run(chunk, key, tmp_dir))
+    del chunk
+    
+    files = [open(path, 'r', newline='', encoding='utf-8') for path in run_files]
+    try:
+        yield from heapq.merge(*(csv.reader(file) for file in files), key=key)
+    finally:
+        for file, path in zip(files, run_files):
+            file.close()
+            os.remove(path)
+
+def sorted_mapping_path(mapping_file):
+    """Return the path of the copy of a mapping CSV sorted by company_id"""
+    return os.path.splitext(strip_compression(mapping_file))[0] + ".sorted.csv"
+
+def build_sorted_mapping(mapping_file, sorted_path, tmp_dir=None):
+    """Write a copy of the mapping CSV sorted by company_id with one row per ID"""
+    tmp_path = f"{sorted_path}.tmp"
+    total = 0
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['company_id', 'short_name'])
+        
+        previous = None
+        for row in external_sort(iter_mapping_rows(mapping_file), lambda r: r[0], tmp_dir=tmp_dir):
+            # Equal IDs arrive in file order; keep the last one like the dict loader
+            if previous is not None and previous[0] != row[0]:
+                writer.writerow(previous)
+                total += 1
+            previous = row
+        if previous is not None:
+            writer.writerow(previous)
+            total += 1
+    
+    os.replace(tmp_path, sorted_path)
+    print(f"✓ Built sorted mapping {os.path.basename(sorted_path)} with {total} IDs")
+
+def merge_join(sorted_ids, sorted_mapping):
+    """Join (company_id, position) rows against (company_id, short_name) rows, both sorted by ID"""
+    mapping_iter = iter(sorted_mapping)
+    current = next(mapping_iter, None)
+    for company_id, position in sorted_ids:
+        while current is not None and current[0] < company_id:
+            current = next(mapping_iter, None)
+        short_name = current[1] if current is not None and current[0] == company_id else ''
+        yield position, company_id, short_name
+
+def sort_merge_join_file(input_file, mapping_file, output_filename, keep_order=False, tmp_dir=None):
+    """Map an input file of any size against the mapping with bounded memory"""
+    sorted_path = sorted_mapping_path(mapping_file)
+    if not (os.path.exists(sorted_path) and os.path.getmtime(sorted_path) >= os.path.getmtime(mapping_file)):
+        print(f"  Sorting mapping file by company_id (one-time step for this mapping file)...")
+        build_sorted_mapping(mapping_file, sorted_path, tmp_dir)
+    
+    # Tag each input ID with its position so the original order can be restored
+    positioned_ids = ([company_id, str(position)] for position, company_id in enumerate(iter_company_ids(input_file)))
+    sorted_ids = external_sort(positioned_ids, lambda r: r[0], tmp_dir=tmp_dir)
+    
+    total = 0
+    with_short_name = 0
+    with open(sorted_path, 'r', newline='', encoding='utf-8') as mapping:
+        reader = csv.reader(mapping)
+        next(reader, None)
+        joined = merge_join(sorted_ids, reader)
+        if keep_order:
+            joined = external_sort(joined, lambda r: int(r[0]), tmp_dir=tmp_dir)
+        
+        with open_csv(output_filename, 'w') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['_id', 'short_name'])
+            for _, company_id, short_name in joined:
+                writer.writerow([company_id, short_name])
+                total += 1
+                if short_name:
+                    with_short_name += 1
+    
+    return total, with_short_name
+
+def map_file(input_file):
+    """Map one input file against the shared mapping and write its output file (batch worker)"""
+    start_time = time.time()
+    company_ids = read_company_ids_from_csv(input_file)
+    
+    if _BATCH_DAEMON:
+        mapping = fetch_mapping_from_daemon(company_ids)
+    elif _BATCH_COLUMNAR_MAPPING is not None:
+        mapping = load_columnar_subset(_BATCH_COLUMNAR_MAPPING, company_ids)
+    elif _BATCH_STORE_PATH:
+        conn = open_mapping_store(_BATCH_STORE_PATH)
+        try:
+            mapping = load_mapping_subset(conn, company_ids)
+        finally:
+            conn.close()
+    else:
+        mapping = _BATCH_MAPPING
+    
+    results = fetch_short_names_from_mapping(company_ids, mapping)
+    # Workers only read the cache; run_batch saves what they resolved, so no two processes write it at once
+    resolved = apply_db_fallback(results, save=False) if _BATCH_FALLBACK else {}
+    
+    output_filename = None
+    if results:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        input_basename = csv_stem(input_file)
+        output_filename = with_compression(os.path.join(OUTPUT_DIR, f"{input_basename}_output_{timestamp}.csv"),
+                                           _BATCH_COMPRESSION or compression_for(input_file))
+        write_to_csv(results, output_filename)
+    
+    return {
+        "file": os.path.basename(input_file),
+        "records": len(results),
+        "with_short_name": sum(1 for r in results if r.get('short_name')),
+        "seconds": time.time() - start_time,
+        "output": output_filename,
+        "resolved": resolved,
+    }
+
+def run_batch(csv_files, mapping_file_path, workers=DEFAULT_WORKERS, db_fallback=False, write_back=False,
+              use_daemon=True, compression=None):
+    """Load the mapping once and map every input file on a process pool"""
+    global _BATCH_MAPPING, _BATCH_STORE_PATH, _BATCH_COLUMNAR_MAPPING, _BATCH_DAEMON, _BATCH_FALLBACK
+    global _BATCH_COMPRESSION
+    _BATCH_FALLBACK = db_fallback
+    _BATCH_COMPRESSION = compression
+    
+    print(f"\nStep 1: Loading company_id to short_name mapping...")
+    start_time = time.time()
+    health = daemon_serving(mapping_file_path) if use_daemon else None
+    if health:
+        _BATCH_DAEMON = True
+        print(f"✓ Using lookup daemon serving {health['snapshot']}")
+        if write_back and USE_MAPPING_STORE and not columnar_format(mapping_file_path):
+            # Lookups go to the daemon, but resolved IDs are written back to the store
+            _BATCH_STORE_PATH = ensure_mapping_store(mapping_file_path)
+    elif columnar_format(mapping_file_path):
+        # Read the two columns once; forked workers filter the shared table for their own IDs
+        _BATCH_COLUMNAR_MAPPING = open_columnar_mapping(mapping_file_path)
+        print(f"✓ Read {_BATCH_COLUMNAR_MAPPING.num_rows} mappings from {os.path.basename(mapping_file_path)}")
+    elif USE_MAPPING_STORE:
+        _BATCH_STORE_PATH = ensure_mapping_store(mapping_file_path)
+    else:
+        _BATCH_MAPPING = load_company_short_name_mapping(mapping_file_path, compact=COMPACT_MAPPING)
+        if not _BATCH_MAPPING:
+            print("\n✗ Failed to load mapping. Exiting.")
+            return []
+    print(f"  Loaded in {time.time() - start_time:.2f} seconds")
+    
+    print(f"\nStep 2: Mapping {len(csv_files)} file(s) with {workers} worker(s)...")
+    start_time = time.time()
+    workers = max(1, min(workers, len(csv_files)))
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # Fork after loading so workers share the mapping pages copy-on-write
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            stats = pool.map(map_file, csv_files, chunksize=1)
+    else:
+        stats = [map_file(csv_file) for csv_file in csv_files]
+    elapsed_time = time.time() - start_time
+    
+    if db_fallback:
+        resolved = {}
+        for stat in stats:
+            resolved.update(stat["resolved"])
+        save_fallback_results(resolved, _BATCH_STORE_PATH, write_back)
+    
+    print(f"\n{'=' * 60}")
+    print("Batch Summary:")
+    print(f"  {'File':<40} {'Records':>10} {'Mapped':>10} {'Rows/s':>10}")
+    for stat in stats:
+        rate = stat["records"] / max(stat["seconds"], 1e-9)
+        print(f"  {stat['file'][:40]:<40} {stat['records']:>10} {stat['with_short_name']:>10} {rate:>10,.0f}")
+    total_records = sum(stat["records"] for stat in stats)
+    print(f"  Total: {total_records} records in {len(stats)} file(s), {elapsed_time:.2f} seconds "
+          f"({total_records / max(elapsed_time, 1e-9):,.0f} rows/s)")
+    print(f"{'=' * 60}")
+    return stats
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Map company IDs to short names")
+    parser.add_argument("--batch", action="store_true",
+                        help="process every input CSV non-interactively against one mapping load")
+    parser.add_argument("--pattern", default="*.csv",
+                        help="glob (relative to INPUT_DIR) selecting input files (default: *.csv)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"worker processes for batch mode (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--db-fallback", action="store_true",
+                        help="resolve IDs missing from the mapping against the company collection")
+    parser.add_argument("--write-back", action="store_true",
+                        help="with --db-fallback, also add resolved IDs to the mapping store "
+                             "(requires USE_MAPPING_STORE)")
+    parser.add_argument("--external", action="store_true",
+                        help="sort-merge join with bounded memory for inputs larger than RAM")
+    parser.add_argument("--keep-order", action="store_true",
+                        help="with --external, write output rows in the original input order")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="load the mapping locally even if the lookup daemon is running")
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="compress output files (default: same compression as the input file)")
+    args = parser.parse_args()
+    if args.external and args.db_fallback:
+        parser.error("--db-fallback is not supported with --external (the join streams straight to the output file)")
+    if args.write_back and (not USE_MAPPING_STORE or columnar_format(MAPPING_FILE)):
+        parser.error("--write-back needs the SQLite mapping store (USE_MAPPING_STORE = True and a CSV MAPPING_FILE)")
+    
+
     print("=" * 60)
     print("Company ID and Short Name Mapper")
     print("=" * 60)
@@ -95,13 +728,21 @@ if __name__ == "__main__":
         exit(1)
     
     # Get all CSV files from input directory (excluding the mapping file)
-    csv_files = [f for f in glob.glob(os.path.join(INPUT_DIR, "*.csv")) 
-                 if os.path.basename(f) != MAPPING_FILE]
+    mapping_files = {MAPPING_FILE, os.path.basename(sorted_mapping_path(mapping_file_path))}
+    input_pattern = os.path.join(INPUT_DIR, args.pattern)
+    csv_files = [f for f in sorted(set(glob_csv(input_pattern) + glob_columnar(input_pattern)))
+                 if os.path.basename(f) not in mapping_files]
     
     if not csv_files:
         print(f"\n✗ No CSV files found in {INPUT_DIR} (excluding mapping file)")
         exit(1)
     
+    if args.batch:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        stats = run_batch(csv_files, mapping_file_path, args.workers, args.db_fallback, args.write_back,
+                          use_daemon=not args.no_daemon, compression=args.compress)
+        exit(0 if stats else 1)
+    
     print(f"\nFound {len(csv_files)} CSV file(s) in input directory:")
     for i, csv_file in enumerate(csv_files, 1):
         print(f"  {i}. {os.path.basename(csv_file)}")
@@ -123,27 +764,64 @@ if __name__ == "__main__":
     # Create output directory if it doesn't exist
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    try:
-        # Load mapping from CSV
-        print(f"\nStep 1: Loading company_id to short_name mapping...")
-        start_time = time.time()
-        mapping = load_company_short_name_mapping(mapping_file_path)
+    if args.external:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        input_basename = csv_stem(selected_file)
+        output_filename = with_compression(os.path.join(OUTPUT_DIR, f"{input_basename}_output_{timestamp}.csv"),
+                                           args.compress or compression_for(selected_file))
         
-        if not mapping:
-            print("\n✗ Failed to load mapping. Exiting.")
-            exit(1)
-        
-        load_time = time.time() - start_time
-        print(f"  Loaded in {load_time:.2f} seconds")
+        print(f"\nStep 1: Sort-merge joining against {MAPPING_FILE}...")
+        start_time = time.time()
+        total, with_short_name = sort_merge_join_file(selected_file, mapping_file_path, output_filename, args.keep_order)
+        elapsed_time = time.time() - start_time
         
+        print(f"✓ Mapping completed in {elapsed_time:.2f} seconds")
+        print(f"\nSummary:")
+        print(f"  Records with short_name: {with_short_name}")
+        print(f"  Records without short_name: {total - with_short_name}")
+        print(f"  Output file: {output_filename}")
+        exit(0)
+    
+    try:
         # Read company IDs from CSV
-        print(f"\nStep 2: Reading company IDs from selected CSV...")
+        print(f"\nStep 1: Reading company IDs from selected CSV...")
         company_ids = read_company_ids_from_csv(selected_file)
         
         if not company_ids:
             print("\n⚠️  No company IDs found in CSV file")
             exit(1)
         
+        # Load mapping for the requested IDs
+        print(f"\nStep 2: Loading company_id to short_name mapping...")
+        start_time = time.time()
+        health = None if args.no_daemon else daemon_serving(mapping_file_path)
+        if health:
+            # A running daemon already holds the mapping in memory
+            mapping = fetch_mapping_from_daemon(company_ids)
+            print(f"✓ Found {len(mapping)} of {len(set(company_ids))} company IDs via lookup daemon ({health['snapshot']})")
+        elif columnar_format(mapping_file_path):
+            # Memory-mapped snapshot: filter the projected columns instead of building a store
+            mapping = load_columnar_subset(open_columnar_mapping(mapping_file_path), company_ids)
+            print(f"✓ Found {len(mapping)} of {len(set(company_ids))} company IDs in {MAPPING_FILE}")
+        elif USE_MAPPING_STORE:
+            store_path = ensure_mapping_store(mapping_file_path)
+            
+            conn = open_mapping_store(store_path)
+            try:
+                mapping = load_mapping_subset(conn, company_ids)
+            finally:
+                conn.close()
+            print(f"✓ Found {len(mapping)} of {len(set(company_ids))} company IDs in {os.path.basename(store_path)}")
+        else:
+            mapping = load_company_short_name_mapping(mapping_file_path, compact=COMPACT_MAPPING)
+            
+            if not mapping:
+                print("\n✗ Failed to load mapping. Exiting.")
+                exit(1)
+        
+        load_time = time.time() - start_time
+        print(f"  Loaded in {load_time:.2f} seconds")
+        
         # Fetch short names from mapping
         print(f"\nStep 3: Mapping company IDs to short names...")
         start_time = time.time()
@@ -153,11 +831,19 @@ if __name__ == "__main__":
         print(f"✓ Mapping completed in {elapsed_time:.2f} seconds")
         print(f"✓ Processed {len(all_results)} company IDs")
         
+        if args.db_fallback:
+            print(f"\nStep 3b: Resolving IDs missing from the mapping...")
+            # The store is only written to; build it if the daemon answered the lookups instead
+            use_store = USE_MAPPING_STORE and not columnar_format(mapping_file_path) and args.write_back
+            store_path = ensure_mapping_store(mapping_file_path) if use_store else None
+            apply_db_fallback(all_results, store_path, args.write_back)
+        
         if all_results:
             # Generate output filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            input_basename = os.path.splitext(os.path.basename(selected_file))[0]
-            output_filename = os.path.join(OUTPUT_DIR, f"{input_basename}_output_{timestamp}.csv")
+            input_basename = csv_stem(selected_file)
+            output_filename = with_compression(os.path.join(OUTPUT_DIR, f"{input_basename}_output_{timestamp}.csv"),
+                                               args.compress or compression_for(selected_file))
             
             # Export to CSV
             print(f"\nStep 4: Writing results to CSV...")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from map_company_shortnames import INPUT_DIR, COMPACT_MAPPING, load_company_short_name_mapping
+from generate_owler_profile_urls import generate_profile_url
+from compressed_io import glob_csv
+from columnar_io import glob_columnar
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8765
+MAPPING_DIR = INPUT_DIR  # Directory watched for mapping snapshots
+MAPPING_PATTERN = "company_id_short_name_unique_*.csv"  # Snapshot files produced by export_company_shortnames.py
+RELOAD_INTERVAL = 30  # Seconds between checks for a newer snapshot
+
+# Current snapshot; replaced as a whole on reload so readers never see a partial mapping
+_STATE = {"mapping": {}, "snapshot": None, "mtime": None, "loaded_at": None}
+_STATE_LOCK = threading.Lock()
+
+
+def find_latest_snapshot(mapping_dir=MAPPING_DIR, pattern=MAPPING_PATTERN):
+    """Return the most recently modified mapping snapshot (plain, .gz, .zst, .parquet or .arrow), if any"""
+    snapshot_pattern = os.path.join(mapping_dir, pattern)
+    snapshots = [f for f in glob_csv(snapshot_pattern) + glob_columnar(snapshot_pattern)
+                 if not f.endswith(".sorted.csv")]
+    return max(snapshots, key=os.path.getmtime) if snapshots else None
+
+def load_snapshot(snapshot):
+    """Load a snapshot and swap it in once it is fully loaded"""
+    start_time = time.time()
+    mtime = os.path.getmtime(snapshot)
+    mapping = load_company_short_name_mapping(snapshot, compact=COMPACT_MAPPING)
+    if not mapping:
+        print(f"⚠️  Keeping previous snapshot, {os.path.basename(snapshot)} is empty or unreadable")
+        return False
+    
+    with _STATE_LOCK:
+        _STATE.update(mapping=mapping, snapshot=snapshot, mtime=mtime, loaded_at=time.time())
+    print(f"✓ Serving {os.path.basename(snapshot)} (loaded in {time.time() - start_time:.2f} seconds)")
+    return True
+
+def watch_snapshots(interval=RELOAD_INTERVAL, mapping_dir=MAPPING_DIR, pattern=MAPPING_PATTERN):
+    """Reload the mapping whenever a newer snapshot appears"""
+    while True:
+        time.sleep(interval)
+        try:
+            snapshot = find_latest_snapshot(mapping_dir, pattern)
+            if snapshot and (snapshot != _STATE["snapshot"] or os.path.getmtime(snapshot) != _STATE["mtime"]):
+                print(f"\nNew snapshot detected: {os.path.basename(snapshot)}")
+                load_snapshot(snapshot)
+        except Exception as e:
+            print(f"✗ Error reloading snapshot: {e}")
+
+def lookup(company_ids):
+    """Resolve short_name and profile_url for a batch of company IDs"""
+    mapping = _STATE["mapping"]
+    results = []
+    for company_id in company_ids:
+        short_name = mapping.get(company_id, '')
+        results.append({
+            "_id": company_id,
+            "short_name": short_name,
+            "profile_url": generate_profile_url(company_id, short_name) if short_name else '',
+        })
+    return results
+
+class LookupHandler(BaseHTTPRequestHandler):
+    """Serve GET /health and POST /lookup with a JSON body of {"ids": [...]}"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "snapshot": os.path.basename(_STATE["snapshot"]) if _STATE["snapshot"] else None,
+            "entries": len(_STATE["mapping"]),
+            "loaded_at": _STATE["loaded_at"],
+        })
+    
+    def do_POST(self):
+        if self.path != "/lookup":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            company_ids = json.loads(self.rfile.read(length).decode('utf-8'))["ids"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"invalid request: {e}"})
+            return
+        self._send_json(200, {"results": lookup(company_ids)})
+    
+    def log_message(self, format, *args):
+        # Keep the console for load/reload messages
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve company_id lookups from an in-memory mapping snapshot")
+    parser.add_argument("--snapshot",
+                        help=f"serve this mapping file (reloaded when it changes) instead of the newest "
+                             f"{MAPPING_PATTERN} in {MAPPING_DIR}; mappers only use a daemon serving their MAPPING_FILE")
+    args = parser.parse_args()
+    mapping_dir, pattern = (os.path.split(os.path.abspath(args.snapshot)) if args.snapshot
+                            else (MAPPING_DIR, MAPPING_PATTERN))
+    
+    print("=" * 60)
+    print("Company Mapping Lookup Daemon")
+    print("=" * 60)
+    
+    snapshot = find_latest_snapshot(mapping_dir, pattern)
+    if not snapshot:
+        print(f"\n✗ No mapping snapshot matching {pattern} in {mapping_dir}")
+        exit(1)
+    
+    print(f"\nStep 1: Loading {os.path.basename(snapshot)}...")
+    if not load_snapshot(snapshot):
+        exit(1)
+    
+    threading.Thread(target=watch_snapshots, args=(RELOAD_INTERVAL, mapping_dir, pattern), daemon=True).start()
+    
+    server = ThreadingHTTPServer((HOST, PORT), LookupHandler)
+    print(f"\nStep 2: Listening on http://{HOST}:{PORT} (checking for new snapshots every {RELOAD_INTERVAL}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Shutting down")
+    finally:
+        server.server_close()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import csv
+import io
+import mmap
+import multiprocessing
+import os
+
+from compressed_io import compression_for, open_csv
+
+# Configuration
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024  # Files smaller than this are parsed on one core
+CHUNKS_PER_WORKER = 4  # Chunks per worker, so uneven chunks still balance across cores
+STREAM_CHUNK_ROWS = 1000000  # Rows per chunk when a compressed file is streamed instead of mapped
+
+
+def find_chunk_boundaries(mm, start, chunks):
+    """Split mm[start:] into roughly equal ranges that end on newline boundaries"""
+    size = len(mm)
+    step = max((size - start) // chunks, 1)
+    boundaries = [start]
+    position = start
+    while True:
+        position += step
+        if position >= size:
+            break
+        newline = mm.find(b'\n', position)
+        if newline == -1:
+            break
+        position = newline + 1
+        boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def parse_range(path, start, end, column_indexes, transform=None):
+    """Parse one byte range of a CSV file into tuples of stripped column values"""
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+
+    rows = [select_columns(row, column_indexes) for row in csv.reader(io.StringIO(text, newline=''))]
+    return transform(rows) if transform else rows
+
+def select_columns(row, column_indexes):
+    """Pick stripped values by column index, '' where the column is missing"""
+    return tuple(
+        row[index].strip() if index is not None and index < len(row) else ''
+        for index in column_indexes
+    )
+
+def parse_compressed(path, columns, transform=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """Stream a compressed CSV on the current core, in chunks of rows, with the same output as iter_csv_chunks"""
+    with open_csv(path) as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader, [])]
+        column_indexes = [header.index(name) if name in header else None for name in columns]
+        rows = []
+        for row in reader:
+            rows.append(select_columns(row, column_indexes))
+            if len(rows) >= chunk_rows:
+                yield transform(rows) if transform else rows
+                rows = []
+        if rows:
+            yield transform(rows) if transform else rows
+
+def rows_to_dict(rows):
+    """Map the first column to the second, skipping rows with an empty key (later rows win)"""
+    return {row[0]: row[1] for row in rows if row[0]}
+
+def non_empty_first_column(rows):
+    """Collect the first column of rows where it is not empty"""
+    return [row[0] for row in rows if row[0]]
+
+def non_empty_key_rows(rows):
+    """Keep rows whose first column is not empty"""
+    return [row for row in rows if row[0]]
+
+def _parse_range_task(task):
+    return parse_range(*task)
+
+def iter_csv_chunks(path, columns, transform=None, workers=None):
+    """Parse selected columns of a large CSV on all cores via mmap, yielding chunk results in file order
+
+    The file is memory-mapped and split into chunks at newline boundaries,
+    so values must not contain embedded newlines (true for the exports this
+    repo produces). Each chunk is parsed with a plain column-indexed reader
+    into a list of tuples, optionally passed through `transform` (a
+    top-level function) in the worker. Chunks are yielded as they complete
+    (in order), so a caller can fold them into its own structure without
+    holding every chunk at once. Small files, or calls from inside a worker
+    process, are parsed on the current core. Compressed files (.gz/.zst)
+    cannot be mapped and are streamed on the current core instead.
+    """
+    if compression_for(path):
+        yield from parse_compressed(path, columns, transform)
+        return
+
+    workers = workers or os.cpu_count() or 1
+
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b'\n') + 1 or size
+            header = next(csv.reader([mm[:header_end].decode('utf-8')]), [])
+
+            # Daemonic pool workers cannot start their own pools
+            parallel = (workers > 1 and size >= PARALLEL_MIN_BYTES
+                        and not multiprocessing.current_process().daemon)
+            ranges = find_chunk_boundaries(mm, header_end, workers * CHUNKS_PER_WORKER if parallel else 1)
+
+    header = [name.strip() for name in header]
+    column_indexes = [header.index(name) if name in header else None for name in columns]
+    tasks = [(path, start, end, column_indexes, transform) for start, end in ranges if end > start]
+
+    if not parallel:
+        for task in tasks:
+            yield parse_range(*task)
+        return
+
+    with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+        yield from pool.imap(_parse_range_task, tasks, chunksize=1)
+
+def parse_csv_chunks(path, columns, transform=None, workers=None):
+    """Parse selected columns of a large CSV on all cores; returns iter_csv_chunks' per-chunk results as a list"""
+    return list(iter_csv_chunks(path, columns, transform, workers))
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import export_company_ids_by_task
+from export_company_ids_by_task import connect_mongodb, serialize_value
+from map_company_shortnames import (
+    INPUT_DIR, MAPPING_FILE, USE_MAPPING_STORE, COMPACT_MAPPING,
+    fetch_short_names_from_mapping, load_company_short_name_mapping,
+    ensure_mapping_store,
+    open_mapping_store, load_mapping_subset, open_columnar_mapping, load_columnar_subset,
+)
+from generate_owler_profile_urls import OUTPUT_DIR, generate_urls_from_data
+from lookup_client import daemon_serving, fetch_mapping_from_daemon
+from compressed_io import open_csv, with_compression
+from columnar_io import columnar_format
+
+# Configuration
+DEFAULT_LIMIT = 10000  # Default number of tasks to export
+CHUNK_SIZE = 10000  # Records handed between stages at a time
+STAGE_QUEUE_SIZE = 4  # Chunks buffered between two stages before the upstream stage waits
+TAP_STAGES = ("export", "map")  # Intermediate stages that can be persisted with --tap
+
+_DONE = object()
+
+
+def export_stage(collection, task_type, limit, chunk_size=CHUNK_SIZE):
+    """Yield chunks of company IDs for a task type's OPEN tasks (the export_company_ids_by_task query)"""
+    cursor = collection.find(
+        {"status": "OPEN", "task_type": task_type},
+        {"company_id": 1, "_id": 0}
+    ).batch_size(chunk_size).limit(limit)
+
+    chunk = []
+    for doc in cursor:
+        company_id = serialize_value(doc.get("company_id", ""))
+        if company_id in ("", None):
+            continue
+        # The mapping is keyed by the company_id string, as read back from an export CSV
+        chunk.append(str(company_id))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def map_stage(id_chunks, mapping_file, use_daemon=True):
+    """Yield chunks of {_id, short_name} records, looking up only each chunk's IDs
+
+    Uses the lookup daemon when it is running, otherwise a memory-mapped
+    .parquet/.arrow snapshot or the indexed mapping store, otherwise the
+    whole mapping file loaded once.
+    """
+    if use_daemon and daemon_serving(mapping_file):
+        print("  Map stage: using the lookup daemon")
+        for chunk in id_chunks:
+            yield fetch_short_names_from_mapping(chunk, fetch_mapping_from_daemon(chunk))
+        return
+
+    if columnar_format(mapping_file):
+        print(f"  Map stage: filtering columnar snapshot {os.path.basename(mapping_file)}")
+        table = open_columnar_mapping(mapping_file)
+        for chunk in id_chunks:
+            yield fetch_short_names_from_mapping(chunk, load_columnar_subset(table, chunk))
+        return
+
+    if USE_MAPPING_STORE:
+        store_path = ensure_mapping_store(mapping_file)
+        print(f"  Map stage: using mapping store {os.path.basename(store_path)}")
+        # SQLite connections belong to the thread that opened them, i.e. this stage's thread
+        conn = open_mapping_store(store_path)
+        try:
+            for chunk in id_chunks:
+                yield fetch_short_names_from_mapping(chunk, load_mapping_subset(conn, chunk))
+        finally:
+            conn.close()
+        return
+
+    print(f"  Map stage: loading {os.path.basename(mapping_file)}")
+    mapping = load_company_short_name_mapping(mapping_file, compact=COMPACT_MAPPING)
+    for chunk in id_chunks:
+        yield fetch_short_names_from_mapping(chunk, mapping)
+
+def url_stage(record_chunks):
+    """Yield chunks of {_id, short_name, profile_url} records"""
+    for chunk in record_chunks:
+        yield generate_urls_from_data(chunk)
+
+def run_in_thread(chunks, name, maxsize=STAGE_QUEUE_SIZE):
+    """Drive a stage in its own thread behind a bounded queue, so consecutive stages overlap
+
+    Exceptions raised in the stage are re-raised in the consumer.
+    """
+    chunk_queue = queue.Queue(maxsize=maxsize)
+
+    def pump():
+        try:
+            for chunk in chunks:
+                chunk_queue.put(chunk)
+        except BaseException as e:
+            chunk_queue.put(e)
+        else:
+            chunk_queue.put(_DONE)
+
+    threading.Thread(target=pump, name=f"pipeline-{name}", daemon=True).start()
+
+    while True:
+        item = chunk_queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+class ChunkWriter:
+    """Stream chunks of records to a CSV, renamed with the final count once closed"""
+
+    def __init__(self, fieldnames, name_for_count, compression=None):
+        self.fieldnames = fieldnames
+        self.name_for_count = lambda count: with_compression(name_for_count(count), compression)
+        self.count = 0
+        self.tmp_file = f"{self.name_for_count(0)}.tmp"
+        self.file = open_csv(self.tmp_file, 'w', compression)
+        try:
+            self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction='ignore')
+            self.writer.writeheader()
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, records):
+        self.writer.writerows(records)
+        self.count += len(records)
+
+    def close(self):
+        """Finish the file; returns its name, or None (and removes it) when empty"""
+        self.file.close()
+        if not self.count:
+            os.remove(self.tmp_file)
+            return None
+        filename = self.name_for_count(self.count)
+        os.replace(self.tmp_file, filename)
+        return filename
+
+    def abort(self):
+        """Discard a file left incomplete by a failed run, so it never gets a final name"""
+        try:
+            self.file.close()
+        finally:
+            if os.path.exists(self.tmp_file):
+                os.remove(self.tmp_file)
+
+def tap(chunks, writer, to_records=None):
+    """Persist every chunk passing through a stage without holding it back"""
+    for chunk in chunks:
+        writer.write(to_records(chunk) if to_records else chunk)
+        yield chunk
+
+def run_pipeline(collection, task_type, limit, mapping_file, taps=(), use_daemon=True,
+                 chunk_size=CHUNK_SIZE, output_dir=OUTPUT_DIR, compression=None):
+    """Run export → map → URL stages in one process, writing only the final URL file (plus taps)
+
+    Returns {"urls": filename, "export"/"map": tap filenames, "total", "with_short_name"}.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    writers = {}
+    stats = {"total": 0, "with_short_name": 0}
+    try:
+        # Opened inside the try so a writer that fails to open still gets the earlier ones aborted
+        if "export" in taps:
+            writers["export"] = ChunkWriter(["company_id"],
+                                            lambda n: os.path.join(output_dir, f"{task_type}_{n}.csv"), compression)
+        if "map" in taps:
+            writers["map"] = ChunkWriter(["_id", "short_name"],
+                                         lambda n: os.path.join(output_dir, f"{task_type}_{n}_output_{timestamp}.csv"),
+                                         compression)
+        writers["urls"] = ChunkWriter(["_id", "short_name", "profile_url"],
+                                      lambda n: os.path.join(output_dir, f"{task_type}_{n}_with_urls_{timestamp}.csv"),
+                                      compression)
+
+        chunks = run_in_thread(export_stage(collection, task_type, limit, chunk_size), "export")
+        if "export" in writers:
+            chunks = tap(chunks, writers["export"], lambda ids: [{"company_id": i} for i in ids])
+        chunks = run_in_thread(map_stage(chunks, mapping_file, use_daemon), "map")
+        if "map" in writers:
+            chunks = tap(chunks, writers["map"])
+        for chunk in url_stage(chunks):
+            writers["urls"].write(chunk)
+            stats["total"] += len(chunk)
+            stats["with_short_name"] += sum(1 for r in chunk if r.get("short_name"))
+            print(f"  {stats['total']:,} records through the pipeline")
+    except BaseException:
+        for writer in writers.values():
+            try:
+                writer.abort()
+            except Exception:
+                # Keep the stage's error, not a cleanup error
+                pass
+        raise
+
+    for stage, writer in writers.items():
+        stats[stage] = writer.close()
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export OPEN tasks, map them to short names and generate profile URLs in one process"
+    )
+    parser.add_argument("--task-type", help="task type to export (prompted for when omitted)")
+    parser.add_argument("--limit", type=int, help=f"maximum tasks to export (default: {DEFAULT_LIMIT})")
+    parser.add_argument("--tap", action="append", choices=TAP_STAGES, default=[],
+                        help="also persist an intermediate stage (repeatable): export or map")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="do not use the lookup daemon even when it is running")
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="write compressed CSVs (.csv.gz / .csv.zst), compressed on background threads")
+    args = parser.parse_args()
+
+    script_start_time = time.time()
+    print("=" * 60)
+    print("Pipeline: export → map short names → profile URLs")
+    print("=" * 60)
+
+    try:
+        task_type = (args.task_type or input("Task Type (required): ")).strip().upper()
+        if not task_type:
+            print("\n✗ Task Type is required. Exiting.")
+            exit(1)
+        limit = args.limit
+        if limit is None:
+            limit_input = input(f"Limit (press Enter for default: {DEFAULT_LIMIT}): ").strip()
+            limit = int(limit_input) if limit_input else DEFAULT_LIMIT
+    except ValueError:
+        print("\n✗ Invalid input for limit. Must be a number.")
+        exit(1)
+    except KeyboardInterrupt:
+        print("\n✗ Cancelled by user.")
+        exit(1)
+
+    mapping_file_path = os.path.join(INPUT_DIR, MAPPING_FILE)
+    if not os.path.exists(mapping_file_path):
+        print(f"\n✗ Mapping file not found: {mapping_file_path}")
+        exit(1)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    client, db = connect_mongodb(export_company_ids_by_task.MONGODB_URI, export_company_ids_by_task.DATABASE_NAME)
+    if db is None:
+        exit(1)
+
+    try:
+        stats = run_pipeline(db[export_company_ids_by_task.COLLECTION_NAME], task_type, limit, mapping_file_path,
+                             taps=args.tap, use_daemon=not args.no_daemon, compression=args.compress)
+
+        print(f"\nSummary:")
+        print(f"  Records with short_name: {stats['with_short_name']}")
+        print(f"  Records without short_name: {stats['total'] - stats['with_short_name']}")
+        for stage in TAP_STAGES:
+            if stats.get(stage):
+                print(f"  {stage} tap: {stats[stage]}")
+        print(f"  Output file: {stats['urls'] or 'none (no OPEN tasks found)'}")
+
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    finally:
+        client.close()
+        print("✓ Connection closed")
+
+        total_time = time.time() - script_start_time
+        print(f"\n{'=' * 60}")
+        print(f"Total execution time: {total_time:.2f} seconds")
+        print(f"{'=' * 60}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import ssl
+import certifi
+import time
+from datetime import datetime
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, OperationFailure
+
+# Configuration
+# Replace with your MongoDB connection string:
+# MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
+MONGODB_URI = ""
+DATABASE_NAME = "owler"
+COLLECTION_NAME = "cp_task"
+CACHE_FILE = "task_stats_cache.json"
+DEFAULT_TTL = 300  # Seconds a status's counts are served from the cache
+FULL_REFRESH_TTL = 3600  # Seconds before a full recount (picks up statuses that did not exist before)
+GROUP_INDEX_HINT = [("status", 1), ("task_type", 1)]  # Lets the aggregation read index keys only (None lets the planner choose)
+
+
+def connect_mongodb(uri, db_name):
+    """Establish connection to MongoDB"""
+    try:
+        # Use certifi for SSL certificate verification on macOS
+        client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=5000,
+            tlsCAFile=certifi.where()
+        )
+        client.admin.command('ping')
+        db = client[db_name]
+        print(f"✓ Connected to {db_name}")
+        return client, db
+    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+        print(f"✗ Error: Cannot connect to MongoDB - {e}")
+        return None, None
+
+def count_by_status_and_type(collection, statuses=None, hint=GROUP_INDEX_HINT):
+    """Count tasks per status × task_type in one aggregation, optionally for some statuses only"""
+    pipeline = []
+    if statuses:
+        pipeline.append({"$match": {"status": {"$in": list(statuses)}}})
+    pipeline.append({"$group": {
+        "_id": {"status": "$status", "task_type": "$task_type"},
+        "count": {"$sum": 1},
+    }})
+
+    def run(**options):
+        counts = {status: {} for status in statuses or []}
+        for row in collection.aggregate(pipeline, allowDiskUse=True, **options):
+            status = str(row["_id"].get("status"))
+            task_type = str(row["_id"].get("task_type"))
+            counts.setdefault(status, {})[task_type] = row["count"]
+        return counts
+
+    if hint:
+        try:
+            return run(hint=hint)
+        except OperationFailure as e:
+            print(f"⚠️  Index hint not usable ({e}), aggregating without it")
+    return run()
+
+def load_cache(cache_file=CACHE_FILE):
+    """Load cached counts, or an empty cache if there is none"""
+    if not os.path.exists(cache_file):
+        return {"full_refresh_at": 0, "statuses": {}}
+    with open(cache_file, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    """Write the cache atomically so a polling reader never sees a partial file"""
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+def stale_statuses(cache, ttl, statuses=None, now=None):
+    """Return the cached statuses older than `ttl`, among `statuses` when given"""
+    now = time.time() if now is None else now
+    return {status for status, entry in cache["statuses"].items()
+            if (not statuses or status in statuses) and now - entry["computed_at"] >= ttl}
+
+def refresh_stats(collection, cache, ttl=DEFAULT_TTL, refresh=None, full_ttl=FULL_REFRESH_TTL, statuses=None):
+    """Bring the cache up to date, recounting only the statuses that need it
+
+    A full recount runs when the cache is empty, older than `full_ttl`, or
+    `refresh` is an empty list. Otherwise only the statuses named in
+    `refresh` and those older than `ttl` are recounted; with `statuses`,
+    expired statuses outside it are left for a later run that asks for them.
+    Returns the statuses recounted (None for a full recount, [] when
+    everything came from the cache).
+    """
+    now = time.time()
+    stale = stale_statuses(cache, ttl, statuses, now)
+    stale.update(refresh or [])
+    # Recounting every cached status costs the same as a full recount, which also finds new statuses
+    if (refresh == [] or not cache["statuses"] or now - cache["full_refresh_at"] >= full_ttl
+            or stale >= set(cache["statuses"])):
+        counts = count_by_status_and_type(collection)
+        cache["statuses"] = {
+            status: {"computed_at": now, "counts": type_counts}
+            for status, type_counts in counts.items()
+        }
+        cache["full_refresh_at"] = now
+        return None
+
+    if not stale:
+        return []
+
+    counts = count_by_status_and_type(collection, sorted(stale))
+    for status, type_counts in counts.items():
+        if type_counts:
+            cache["statuses"][status] = {"computed_at": now, "counts": type_counts}
+        else:
+            # No tasks left with this status
+            cache["statuses"].pop(status, None)
+    return sorted(stale)
+
+def print_table(cache, statuses=None):
+    """Print counts as a task_type × status table with totals"""
+    statuses = statuses or sorted(cache["statuses"])
+    counts = {status: cache["statuses"].get(status, {}).get("counts", {}) for status in statuses}
+    task_types = sorted({task_type for type_counts in counts.values() for task_type in type_counts})
+
+    width = max([len("task_type"), len("TOTAL")] + [len(t) for t in task_types])
+    column_widths = [max(len(status), 10) for status in statuses]
+    header = f"{'task_type':<{width}}  " + "  ".join(f"{s:>{w}}" for s, w in zip(statuses, column_widths))
+    print(header)
+    print("-" * len(header))
+    for task_type in task_types:
+        cells = "  ".join(f"{counts[s].get(task_type, 0):>{w},}" for s, w in zip(statuses, column_widths))
+        print(f"{task_type:<{width}}  {cells}")
+    print("-" * len(header))
+    totals = "  ".join(f"{sum(counts[s].values()):>{w},}" for s, w in zip(statuses, column_widths))
+    print(f"{'TOTAL':<{width}}  {totals}")
+
+    for status in statuses:
+        computed_at = cache["statuses"].get(status, {}).get("computed_at")
+        if computed_at:
+            age = time.time() - computed_at
+            print(f"  {status}: counted {datetime.fromtimestamp(computed_at):%Y-%m-%d %H:%M:%S} ({age:.0f}s ago)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count cp_task documents per status × task_type, with a local cache")
+    parser.add_argument("--status", nargs="+", type=str.upper,
+                        help="only show these statuses (e.g. OPEN CLEAR_QUEUE)")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL,
+                        help=f"seconds cached counts stay fresh (default: {DEFAULT_TTL})")
+    parser.add_argument("--refresh", nargs="*", type=str.upper,
+                        help="recount these statuses now, or everything when no status is given")
+    parser.add_argument("--cache-file", default=CACHE_FILE,
+                        help=f"cache location (default: {CACHE_FILE})")
+    parser.add_argument("--json", action="store_true",
+                        help="print the counts as JSON (for dashboards) instead of a table")
+    args = parser.parse_args()
+
+    script_start_time = time.time()
+    cache = load_cache(args.cache_file)
+
+    # Serve straight from the cache when nothing is due, without connecting at all
+    now = time.time()
+    needs_refresh = (
+        args.refresh is not None
+        or not cache["statuses"]
+        or now - cache["full_refresh_at"] >= FULL_REFRESH_TTL
+        or stale_statuses(cache, args.ttl, args.status, now)
+    )
+
+    if needs_refresh:
+        # Keep stdout clean for JSON consumers; progress goes to stderr instead
+        with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+            client, db = connect_mongodb(MONGODB_URI, DATABASE_NAME)
+            if db is None:
+                exit(1)
+            try:
+                recounted = refresh_stats(db[COLLECTION_NAME], cache, args.ttl, args.refresh, statuses=args.status)
+                save_cache(cache, args.cache_file)
+                print(f"✓ Recounted {'all statuses' if recounted is None else ', '.join(recounted) or 'nothing'}")
+            except Exception as e:
+                print(f"✗ Error: {e}")
+                exit(1)
+            finally:
+                client.close()
+
+    if args.json:
+        statuses = args.status or sorted(cache["statuses"])
+        print(json.dumps({
+            "generated_at": datetime.now().isoformat(),
+            "statuses": {status: cache["statuses"].get(status, {"computed_at": None, "counts": {}})
+                         for status in statuses},
+        }, indent=2, sort_keys=True))
+    else:
+        print("=" * 60)
+        print("cp_task counts by status × task_type")
+        print("=" * 60)
+        print_table(cache, args.status)
+        print(f"\nTotal execution time: {time.time() - script_start_time:.2f} seconds")
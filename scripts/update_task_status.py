@@ -1,19 +1,41 @@
 #!/usr/bin/env python3
 
+import argparse
 import csv
+import hashlib
+import itertools
+import json
+import os
 import ssl
 import certifi
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, UpdateMany
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, OperationFailure, BulkWriteError
 from bson import ObjectId
 
+from compressed_io import open_csv
+
 # Configuration
 MONGODB_URI = "mongodb+srv://<USERNAME>:<PASSWORD>@<HOST>/<DATABASE>?retryWrites=true&w=majority&authSource=admin"
 DATABASE_NAME = "owler"
 COLLECTION_NAME = "cp_task"
 NEW_STATUS = "CLEAR_QUEUE"  # Status to update to
 OLD_STATUS = "OPEN"  # Status to update from
+CHUNKED_UPDATE_THRESHOLD = 50000  # Above this many matches (or with a limit), update in batches
+DEFAULT_UPDATE_BATCH_SIZE = 1000  # Starting number of _ids per update batch
+MIN_UPDATE_BATCH_SIZE = 100
+MAX_UPDATE_BATCH_SIZE = 20000
+TARGET_BATCH_LATENCY = 0.5  # Seconds per batch write; the batch size adapts toward this
+PACING_FACTOR = 0.0  # Sleep this multiple of each batch's write time between batches (0 = no pacing)
+COUNT_INDEX_HINT = [("status", 1), ("task_type", 1)]  # Index used for dry-run counts (None lets the planner choose)
+UPDATE_INDEX_HINT = [("status", 1), ("task_type", 1), ("_id", 1)]  # Serves batched updates' _id-ordered scan without a sort
+IDS_PER_OPERATION = 500  # company_ids per UpdateMany in input-file mode
+OPERATIONS_PER_BULK = 10  # UpdateMany operations per unordered bulk_write
+DEFAULT_BULK_WORKERS = 4  # Concurrent bulk_write batches in input-file mode
+JOBS_DIR = "update_jobs"  # Checkpoint and undo logs for batched update jobs
 
 
 def connect_mongodb(uri, db_name):
@@ -37,7 +59,406 @@ def connect_mongodb(uri, db_name):
         print(f"✗ Error: Cannot connect to MongoDB - {e}")
         return None, None
 
+def coerce_company_id(company_id):
+    """Convert a company_id string to the type stored in cp_task (int, ObjectId or string)"""
+    try:
+        # Try to convert to integer first (most common case)
+        if company_id.isdigit():
+            return int(company_id)
+        # Try ObjectId if it looks like one (24 character hex string)
+        elif len(company_id) == 24:
+            return ObjectId(company_id)
+        else:
+            # Use as string
+            return company_id
+    except Exception:
+        # If conversion fails, use as string
+        return company_id
+
+def iter_company_ids_from_csv(csv_file, column="company_id"):
+    """Stream coerced company IDs from a CSV file (plain, .gz or .zst)"""
+    with open_csv(csv_file) as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            company_id = (row.get(column) or '').strip()
+            if company_id:
+                yield coerce_company_id(company_id)
+
+def iter_id_chunks(company_ids, size=IDS_PER_OPERATION):
+    """Group streamed company IDs into lists of at most `size`"""
+    chunk = []
+    for company_id in company_ids:
+        chunk.append(company_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def company_ids_filter(task_type, company_ids):
+    """Filter selecting the OLD_STATUS tasks of one task_type for a list of companies"""
+    return {"status": OLD_STATUS, "task_type": task_type, "company_id": {"$in": company_ids}}
+
+def iter_bulk_batches(company_ids, task_type, ops_per_bulk=OPERATIONS_PER_BULK):
+    """Group company IDs into lists of UpdateMany operations, one list per bulk_write
+    
+    Yields (operations, batch_ids) where batch_ids are the company IDs the operations cover.
+    """
+    update_operation = {"$set": {"status": NEW_STATUS}}
+    operations = []
+    batch_ids = []
+    for chunk in iter_id_chunks(company_ids):
+        operations.append(UpdateMany(company_ids_filter(task_type, chunk), update_operation))
+        batch_ids.extend(chunk)
+        if len(operations) == ops_per_bulk:
+            yield operations, batch_ids
+            operations = []
+            batch_ids = []
+    if operations:
+        yield operations, batch_ids
+
+def run_bulk_batch(collection, batch_number, operations):
+    """Execute one unordered bulk_write, returning its counts and any write errors"""
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return batch_number, result.matched_count, result.modified_count, None
+    except BulkWriteError as e:
+        details = e.details
+        return batch_number, details.get("nMatched", 0), details.get("nModified", 0), details.get("writeErrors", [])
+
+def run_logged_bulk_batch(collection, batch_number, task_type, company_ids, log_undo):
+    """Resolve a batch's companies to task _ids, log them for undo, then update exactly those tasks
+    
+    Logging task _ids (not company IDs) keeps --undo from touching tasks of
+    the same companies that already had NEW_STATUS before the job ran.
+    """
+    task_ids = []
+    for chunk in iter_id_chunks(company_ids):
+        task_ids.extend(doc["_id"] for doc in collection.find(company_ids_filter(task_type, chunk), {"_id": 1}))
+    log_undo(batch_number, task_ids)
+    if not task_ids:
+        return batch_number, 0, 0, None
+    
+    # Re-apply the filter so tasks changed since the read are left alone
+    update_operation = {"$set": {"status": NEW_STATUS}}
+    operations = [UpdateMany({"status": OLD_STATUS, "task_type": task_type, "_id": {"$in": chunk}}, update_operation)
+                  for chunk in iter_id_chunks(task_ids)]
+    return run_bulk_batch(collection, batch_number, operations)
+
+def run_bulk_update_from_ids(collection, task_type, company_ids, workers=DEFAULT_BULK_WORKERS, job=None):
+    """Apply the status change for streamed company IDs with concurrent unordered bulk writes
+    
+    With a job, batches already checkpointed by an earlier run are skipped,
+    and each batch's task _ids are logged for undo before it is written;
+    batches are numbered by their position in the file, so numbering is stable.
+    """
+    totals = {"ids": 0, "matched": job["matched"] if job else 0, "modified": job["modified"] if job else 0,
+              "batches": job["batches"] if job else 0, "errors": {}}
+    lock = threading.Lock()
+    start_time = time.time()
+    
+    def record(future):
+        batch_number, matched, modified, errors = future.result()
+        with lock:
+            totals["batches"] += 1
+            totals["matched"] += matched
+            totals["modified"] += modified
+            if errors:
+                totals["errors"][batch_number] = errors
+            elif job:
+                # Batches with write errors stay unchecked so a rerun retries them
+                append_jsonl(job["checkpoint"], {
+                    "batch": batch_number, "count": batch_counts.pop(batch_number),
+                    "matched": matched, "modified": modified,
+                })
+            elapsed = time.time() - start_time
+            print(f"  Batch {batch_number}: matched {matched}, modified {modified}"
+                  f"{f', {len(errors)} error(s)' if errors else ''} "
+                  f"(total modified {totals['modified']:,}, {totals['ids'] / max(elapsed, 1e-9):,.0f} ids/s)")
+    
+    def log_undo(batch_number, task_ids):
+        with lock:
+            append_jsonl(job["undo"], {"batch": batch_number, "ids": [encode_id(i) for i in task_ids]})
+    
+    batch_counts = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch_number, (operations, batch_ids) in enumerate(iter_bulk_batches(company_ids, task_type), 1):
+            if job and batch_number in job["completed"]:
+                continue
+            # Bound in-flight batches so IDs keep streaming instead of piling up in memory
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future)
+            totals["ids"] += len(batch_ids)
+            if job:
+                with lock:
+                    batch_counts[batch_number] = len(batch_ids)
+                pending.add(executor.submit(run_logged_bulk_batch, collection, batch_number, task_type,
+                                            batch_ids, log_undo))
+            else:
+                pending.add(executor.submit(run_bulk_batch, collection, batch_number, operations))
+        for future in pending:
+            record(future)
+    
+    totals["seconds"] = time.time() - start_time
+    return totals
+
+def encode_id(value):
+    """Make an _id or company_id JSON-serializable without losing its type"""
+    return {"$oid": str(value)} if isinstance(value, ObjectId) else value
+
+def decode_id(value):
+    """Reverse encode_id"""
+    return ObjectId(value["$oid"]) if isinstance(value, dict) else value
+
+def make_job_id(task_type, parameters):
+    """Derive a stable job id from the update parameters, so a rerun finds its checkpoint"""
+    digest = hashlib.sha1(json.dumps(parameters, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"{task_type}_{OLD_STATUS}_to_{NEW_STATUS}_{digest[:10]}"
+
+def job_paths(job_id):
+    """Return the checkpoint and undo log paths of a job"""
+    return (os.path.join(JOBS_DIR, f"{job_id}.checkpoint.jsonl"),
+            os.path.join(JOBS_DIR, f"{job_id}.undo.jsonl"))
+
+def read_jsonl(path):
+    """Read every record of a JSON-lines log, ignoring a torn final line"""
+    records = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+    return records
+
+def append_jsonl(file, record):
+    """Append one record to an open log and force it to disk"""
+    file.write(json.dumps(record) + "\n")
+    file.flush()
+    os.fsync(file.fileno())
+
+def open_job(job_id, mode, resume):
+    """Open (or resume) a job's logs and return its state"""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    checkpoint_path, undo_path = job_paths(job_id)
+    records = read_jsonl(checkpoint_path) if resume else []
+    if not resume and any(os.path.exists(path) for path in (checkpoint_path, undo_path)):
+        # The abandoned run may have applied some batches; keep its logs so they can still be reverted
+        archived_id = f"{job_id}_abandoned_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        for path, archived in zip((checkpoint_path, undo_path), job_paths(archived_id)):
+            if os.path.exists(path):
+                os.replace(path, archived)
+        print(f"  Previous run's logs kept as {archived_id} (revert with --undo {archived_id})")
+    
+    job = {
+        "id": job_id,
+        "mode": mode,
+        "batches": len(records),
+        "processed": sum(r["count"] for r in records),
+        # Counts written by earlier runs, so a resumed job reports its totals rather than this run's
+        "matched": sum(r.get("matched", 0) for r in records),
+        "modified": sum(r.get("modified", 0) for r in records),
+        "last_id": decode_id(records[-1]["last_id"]) if records and mode == "query" else None,
+        "completed": {r["batch"] for r in records},
+        "checkpoint": open(checkpoint_path, 'a', encoding='utf-8'),
+        "undo": open(undo_path, 'a', encoding='utf-8'),
+    }
+    if not records:
+        append_jsonl(job["undo"], {"mode": mode})
+    return job
+
+def finish_job(job):
+    """Close a completed job and archive its logs under a timestamped name"""
+    job["checkpoint"].close()
+    job["undo"].close()
+    archived_id = f"{job['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    for path, archived in zip(job_paths(job["id"]), job_paths(archived_id)):
+        if os.path.exists(path):
+            os.replace(path, archived)
+    print(f"✓ Job logs saved as {archived_id} (revert with --undo {archived_id})")
+
+def undo_job(collection, job_id, batch_size=DEFAULT_UPDATE_BATCH_SIZE):
+    """Revert a job's status change for every document recorded in its undo log"""
+    records = read_jsonl(job_paths(job_id)[1])
+    if not records:
+        print(f"✗ No undo log found for job {job_id}")
+        return None
+    
+    update_operation = {"$set": {"status": OLD_STATUS}}
+    totals = {"matched": 0, "modified": 0}
+    for record in records[1:]:
+        ids = [decode_id(value) for value in record["ids"]]
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            # Every job logs the task _ids it changed, so only those are reverted
+            result = collection.update_many({"_id": {"$in": chunk}, "status": NEW_STATUS}, update_operation)
+            totals["matched"] += result.matched_count
+            totals["modified"] += result.modified_count
+        print(f"  Batch {record['batch']} reverted (total modified {totals['modified']:,})")
+    return totals
+
+def prompt_resume(job_id):
+    """Offer to resume an unfinished job with the same parameters"""
+    records = read_jsonl(job_paths(job_id)[0])
+    if not records:
+        return False
+    print(f"\nFound unfinished job {job_id}: {len(records)} batch(es), "
+          f"{sum(r['count'] for r in records)} document(s) already processed")
+    answer = input("Resume it? (yes/no, default: yes): ").strip().lower()
+    return answer in ['', 'yes', 'y']
+
+def adapt_batch_size(batch_size, latency, target=TARGET_BATCH_LATENCY):
+    """Shrink the batch when writes are slow, grow it when they are fast"""
+    if latency > target * 1.5:
+        return max(MIN_UPDATE_BATCH_SIZE, batch_size // 2)
+    if latency < target / 2:
+        return min(MAX_UPDATE_BATCH_SIZE, int(batch_size * 1.5))
+    return batch_size
+
+def iter_matching_ids(collection, filter_query, last_id=None, limit=None, hint=UPDATE_INDEX_HINT):
+    """Stream the _ids matching a filter in _id order from a single cursor
+    
+    With the {status, task_type, _id} index the scan reads index keys in
+    order with no sort; without it (or when the filter has other fields)
+    the server sorts the matches once, spilling to disk if needed.
+    """
+    query = dict(filter_query)
+    if last_id is not None:
+        # Resume after the last _id already handled
+        query["_id"] = {"$gt": last_id}
+    
+    def open_cursor(use_hint):
+        cursor = collection.find(query, {"_id": 1}, allow_disk_use=True).sort("_id", 1).batch_size(MAX_UPDATE_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor.hint(hint) if use_hint else cursor
+    
+    # The hint only applies when the filter is on the hinted fields
+    use_hint = bool(hint) and set(filter_query) <= {field for field, _ in hint}
+    cursor = open_cursor(use_hint)
+    try:
+        # A missing hinted index only fails once the first batch is requested
+        first = next(cursor, None)
+    except OperationFailure as e:
+        print(f"⚠️  Index hint not usable ({e}); create {{status: 1, task_type: 1, _id: 1}} to avoid a sort")
+        cursor = open_cursor(False)
+        first = next(cursor, None)
+    if first is None:
+        return
+    for doc in itertools.chain([first], cursor):
+        yield doc["_id"]
+
+def run_chunked_update(collection, filter_query, update_operation, limit=None,
+                       batch_size=DEFAULT_UPDATE_BATCH_SIZE, pacing=PACING_FACTOR, job=None):
+    """Stream matching _ids in _id order and update them in adaptively sized batches
+    
+    The _ids come from one cursor over the whole run rather than a query per
+    batch. With a job, each batch's _ids are logged for undo before the write
+    and the batch is checkpointed after it, so a rerun continues after the last _id.
+    """
+    totals = {"matched": job["matched"] if job else 0, "modified": job["modified"] if job else 0,
+              "batches": job["batches"] if job else 0}
+    processed = job["processed"] if job else 0
+    last_id = job["last_id"] if job else None
+    start_time = time.time()
+    resumed_from = processed
+    matching_ids = iter_matching_ids(collection, filter_query, last_id, None if limit is None else limit - processed)
+    
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        ids = list(itertools.islice(matching_ids, size))
+        if not ids:
+            break
+        
+        batch_number = totals["batches"] + 1
+        if job:
+            append_jsonl(job["undo"], {"batch": batch_number, "ids": [encode_id(i) for i in ids]})
+        
+        # Re-apply the filter so documents changed since the read are left alone
+        batch_start = time.time()
+        result = collection.update_many({**filter_query, "_id": {"$in": ids}}, update_operation)
+        latency = time.time() - batch_start
+        
+        last_id = ids[-1]
+        processed += len(ids)
+        totals["matched"] += result.matched_count
+        totals["modified"] += result.modified_count
+        totals["batches"] = batch_number
+        if job:
+            append_jsonl(job["checkpoint"], {
+                "batch": batch_number, "last_id": encode_id(last_id), "count": len(ids),
+                "matched": result.matched_count, "modified": result.modified_count,
+            })
+        
+        elapsed = time.time() - start_time
+        progress = f"{processed:,}/{limit:,}" if limit else f"{processed:,}"
+        print(f"  Batch {batch_number}: {progress} processed, "
+              f"matched {totals['matched']:,}, modified {totals['modified']:,} "
+              f"(batch {len(ids)} in {latency:.2f}s, {(processed - resumed_from) / max(elapsed, 1e-9):,.0f} docs/s)")
+        
+        batch_size = adapt_batch_size(batch_size, latency)
+        if pacing:
+            # Give the primary room to catch up (replication, other clients)
+            time.sleep(latency * pacing)
+    
+    return totals
+
+def count_matching(collection, filter_query, limit=None, hint=COUNT_INDEX_HINT):
+    """Count matching documents, hinting an index the count can be answered from"""
+    options = {}
+    if limit:
+        options["limit"] = limit
+    # The hint only helps (and is only valid) when the filter is on the hinted fields
+    if hint and set(filter_query) <= {field for field, _ in hint}:
+        try:
+            return collection.count_documents(filter_query, hint=hint, **options)
+        except OperationFailure as e:
+            print(f"⚠️  Count hint not usable ({e}), counting without it")
+    return collection.count_documents(filter_query, **options)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Update cp_task status from {OLD_STATUS} to {NEW_STATUS}")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="skip the pre-update count and report counts from the write results")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only count matching documents (index-only count), do not update")
+    parser.add_argument("--input-file",
+                        help="CSV of company IDs to update (e.g. an export_company_ids_by_task.py output)")
+    parser.add_argument("--column", default="company_id",
+                        help="column holding the company IDs in --input-file (default: company_id)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BULK_WORKERS,
+                        help=f"concurrent bulk writes for --input-file (default: {DEFAULT_BULK_WORKERS})")
+    parser.add_argument("--undo",
+                        help=f"revert a finished or interrupted job from its undo log in {JOBS_DIR}/")
+    parser.add_argument("--undo-log", action="store_true",
+                        help="also log the _ids of an unbatched update so it can be reverted with --undo "
+                             "(adds a find pass before the write; batched updates always log)")
+    args = parser.parse_args()
+    
+    if args.undo:
+        print("=" * 60)
+        print(f"Revert job {args.undo}: status '{NEW_STATUS}' -> '{OLD_STATUS}'")
+        print("=" * 60)
+        confirm = input("\nProceed with revert? (yes/no): ").strip().lower()
+        if confirm not in ['yes', 'y']:
+            print("\n✗ Revert cancelled by user.")
+            exit(0)
+        
+        client, db = connect_mongodb(MONGODB_URI, DATABASE_NAME)
+        if db is None:
+            exit(1)
+        try:
+            totals = undo_job(db[COLLECTION_NAME], args.undo)
+            if totals:
+                print(f"\n✓ Reverted: matched {totals['matched']}, modified {totals['modified']}")
+        finally:
+            client.close()
+        exit(0)
+    
     print("=" * 60)
     print("MongoDB Status Update Script")
     print(f"Update status from '{OLD_STATUS}' to '{NEW_STATUS}'")
@@ -47,9 +468,11 @@ if __name__ == "__main__":
     print("\nEnter parameters (press Enter to skip):")
     
     try:
-        # Optional company_id filter
-        company_id_input = input("Company ID (optional, leave empty for all): ").strip()
-        company_id = company_id_input if company_id_input else None
+        # Optional company_id filter (the input file supplies the IDs instead)
+        company_id = None
+        if not args.input_file:
+            company_id_input = input("Company ID (optional, leave empty for all): ").strip()
+            company_id = company_id_input if company_id_input else None
         
         # Mandatory task_type filter
         task_type = input("Task Type (required): ").strip()
@@ -58,22 +481,28 @@ if __name__ == "__main__":
             exit(1)
         
         # Optional limit
-        limit_input = input("Limit (optional, leave empty for no limit): ").strip()
-        limit = int(limit_input) if limit_input else None
+        limit = None
+        if not args.input_file:
+            limit_input = input("Limit (optional, leave empty for no limit): ").strip()
+            limit = int(limit_input) if limit_input else None
         
         print("\n" + "=" * 60)
         print("Configuration:")
-        print(f"  Company ID filter: {company_id if company_id else 'None (all records)'}")
+        if args.input_file:
+            print(f"  Company IDs from: {args.input_file} (column '{args.column}')")
+        else:
+            print(f"  Company ID filter: {company_id if company_id else 'None (all records)'}")
         print(f"  Task Type filter: {task_type}")
         print(f"  Limit: {limit if limit else 'None (no limit)'}")
         print(f"  Status change: {OLD_STATUS} -> {NEW_STATUS}")
         print("=" * 60)
         
         # Confirm before proceeding
-        confirm = input("\nProceed with update? (yes/no): ").strip().lower()
-        if confirm not in ['yes', 'y']:
-            print("\n✗ Update cancelled by user.")
-            exit(0)
+        if not args.dry_run:
+            confirm = input("\nProceed with update? (yes/no): ").strip().lower()
+            if confirm not in ['yes', 'y']:
+                print("\n✗ Update cancelled by user.")
+                exit(0)
             
     except ValueError:
         print("\n✗ Invalid input for limit. Must be a number.")
@@ -97,58 +526,101 @@ if __name__ == "__main__":
         
         # Add company_id filter if provided
         if company_id:
-            try:
-                # Try to convert to integer first (most common case)
-                if company_id.isdigit():
-                    filter_query["company_id"] = int(company_id)
-                # Try ObjectId if it looks like one (24 character hex string)
-                elif len(company_id) == 24:
-                    filter_query["company_id"] = ObjectId(company_id)
-                else:
-                    # Use as string
-                    filter_query["company_id"] = company_id
-            except Exception:
-                # If conversion fails, use as string
-                filter_query["company_id"] = company_id
+            filter_query["company_id"] = coerce_company_id(company_id)
         
         print(f"\nFilter query: {filter_query}")
         
-        # Count matching documents before update
-        print(f"\nStep 2: Counting documents to update...")
-        count_query = filter_query.copy()
-        if limit:
-            # For counting with limit, we need to find the IDs first
-            matching_docs = list(collection.find(count_query, {"_id": 1}).limit(limit))
-            total_to_update = len(matching_docs)
-        else:
-            total_to_update = collection.count_documents(count_query)
-        
-        print(f"✓ Found {total_to_update} document(s) matching criteria")
+        if args.input_file:
+            company_ids = iter_company_ids_from_csv(args.input_file, args.column)
+            
+            if args.dry_run:
+                print(f"\nStep 2: Counting documents for IDs in {args.input_file} (dry run)...")
+                total_to_update = 0
+                for chunk in iter_id_chunks(company_ids):
+                    total_to_update += collection.count_documents(company_ids_filter(task_type, chunk))
+                print(f"✓ {total_to_update} document(s) would be updated from '{OLD_STATUS}' to '{NEW_STATUS}'")
+                exit(0)
+            
+            job_id = make_job_id(task_type, {"input_file": os.path.abspath(args.input_file), "column": args.column})
+            job = open_job(job_id, "file", prompt_resume(job_id))
+            
+            print(f"\nStep 2: Updating status to '{NEW_STATUS}' for IDs in {args.input_file}...")
+            print(f"  Job: {job_id} (checkpoints in {JOBS_DIR}/)")
+            totals = run_bulk_update_from_ids(collection, task_type, company_ids, args.workers, job)
+            if totals["errors"]:
+                print(f"\n⚠️  Rerun with the same parameters to retry the failed batches")
+            else:
+                finish_job(job)
+            
+            print(f"\n{'=' * 60}")
+            print("Update Results:")
+            print(f"  Company IDs: {totals['ids']}")
+            print(f"  Batches: {totals['batches']}")
+            print(f"  Matched: {totals['matched']}")
+            print(f"  Modified: {totals['modified']}")
+            print(f"  Throughput: {totals['ids'] / max(totals['seconds'], 1e-9):,.0f} ids/s")
+            if totals["errors"]:
+                print(f"  Batches with errors: {len(totals['errors'])}")
+                for batch_number, errors in sorted(totals["errors"].items()):
+                    print(f"    Batch {batch_number}: {errors[0].get('errmsg', errors[0])}"
+                          f"{f' (+{len(errors) - 1} more)' if len(errors) > 1 else ''}")
+            print(f"{'=' * 60}")
+            exit(0 if not totals["errors"] else 1)
         
-        if total_to_update == 0:
-            print("\n⚠️  No documents found to update. Exiting.")
+        if args.dry_run:
+            print(f"\nStep 2: Counting documents (dry run)...")
+            total_to_update = count_matching(collection, filter_query, limit)
+            print(f"✓ {total_to_update} document(s) would be updated from '{OLD_STATUS}' to '{NEW_STATUS}'")
             exit(0)
         
+        job_id = make_job_id(task_type, {"filter": filter_query, "limit": limit})
+        resume = prompt_resume(job_id)
+        
+        if args.single_pass or resume:
+            # The write results report the counts, so skip the separate scan
+            total_to_update = None
+        else:
+            # Count matching documents before update
+            print(f"\nStep 2: Counting documents to update...")
+            count_query = filter_query.copy()
+            total_to_update = count_matching(collection, count_query, limit)
+            
+            print(f"✓ Found {total_to_update} document(s) matching criteria")
+            
+            if total_to_update == 0:
+                print("\n⚠️  No documents found to update. Exiting.")
+                exit(0)
+        
         # Perform update
         print(f"\nStep 3: Updating status to '{NEW_STATUS}'...")
         update_operation = {"$set": {"status": NEW_STATUS}}
         
-        if limit:
-            # Update with limit requires updating specific _ids
-            ids_to_update = [doc["_id"] for doc in matching_docs]
-            filter_query = {"_id": {"$in": ids_to_update}}
-            result = collection.update_many(filter_query, update_operation)
+        batched = resume or limit or (total_to_update or 0) > CHUNKED_UPDATE_THRESHOLD
+        if batched or args.undo_log:
+            # Update in checkpointed batches, each logged for --undo, to keep each write small and report progress;
+            # a small --undo-log update is a single logged batch
+            batch_size = DEFAULT_UPDATE_BATCH_SIZE if batched or total_to_update is None else total_to_update
+            job = open_job(job_id, "query", resume)
+            print(f"  Job: {job_id} (checkpoints in {JOBS_DIR}/)")
+            try:
+                totals = run_chunked_update(collection, filter_query, update_operation, limit, batch_size, job=job)
+            except Exception:
+                print(f"\n⚠️  Rerun with the same parameters to resume job {job_id}")
+                raise
+            finish_job(job)
+            matched_count, modified_count = totals["matched"], totals["modified"]
         else:
-            # Update all matching documents
+            # Update all matching documents in one write (no undo log without --undo-log)
             result = collection.update_many(filter_query, update_operation)
+            matched_count, modified_count = result.matched_count, result.modified_count
         
         print(f"\n{'=' * 60}")
         print("Update Results:")
-        print(f"  Matched: {result.matched_count}")
-        print(f"  Modified: {result.modified_count}")
+        print(f"  Matched: {matched_count}")
+        print(f"  Modified: {modified_count}")
         print(f"{'=' * 60}")
         
-        if result.modified_count > 0:
+        if modified_count > 0:
             print("\n✓ SUCCESS!")
         else:
             print("\n⚠️  No documents were modified (they may already have the target status)")